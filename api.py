@@ -0,0 +1,147 @@
+"""
+Read-only JSON API (v1) for the catalog and the logged-in customer's orders.
+
+Every response carries a strong ETag and honours If-None-Match with a bodyless
+304, so polling clients (the delivery app, the storefront cart) pay almost
+nothing when nothing changed:
+
+- catalog responses are tagged with the catalog version and content hash
+  kept by catalog_cache, so a matching poll is answered from worker memory;
+- order responses are tagged from each order's `updated_at`.
+
+Bodies are encoded with orjson when it is installed (datetimes natively,
+ObjectIds through a default hook), falling back to the standard library.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from functools import wraps
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from flask import Blueprint, Response, g, jsonify, request, session
+
+import catalog_cache
+import data_access
+from pagination import clamp_per_page, keyset_filter, next_cursor
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+API_ORDERS_PER_PAGE = 20
+
+ORDER_LIST_FIELDS = {"order_date": 1, "delivery_date": 1, "status": 1, "total_amount": 1, "updated_at": 1}
+ORDER_DETAIL_FIELDS = dict(ORDER_LIST_FIELDS, user_id=1, order_items=1)
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(',', ':'))
+
+
+def conditional_json(etag, build, cache_control='private, no-cache'):
+    """
+    304 if the client already holds `etag`; otherwise serialize build().
+    `build` is only called when a body is actually needed.
+    """
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(dumps(build()), mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = cache_control
+    return resp
+
+
+def order_version(order):
+    stamp = order.get('updated_at') or order.get('order_date')
+    return f"{order['_id']}:{stamp.isoformat() if isinstance(stamp, datetime) else stamp}:{order.get('status')}"
+
+
+def api_login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'authentication required'}), 401
+        try:
+            g.api_user_id = ObjectId(session['user_id'])
+        except (InvalidId, TypeError):
+            return jsonify({'error': 'authentication required'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def init_app(app, db):
+    api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+    @api.route('/products')
+    def products():
+        tag, items = catalog_cache.snapshot(db)
+        return conditional_json(f"catalog-{tag}", lambda: {'products': items},
+                                cache_control='public, no-cache')
+
+    @api.route('/products/<product_id>')
+    def product(product_id):
+        try:
+            oid = ObjectId(product_id)
+        except Exception:
+            return jsonify({'error': 'invalid product id'}), 404
+        tag, items = catalog_cache.snapshot(db)
+        etag = f"catalog-{tag}-{product_id}"
+        if etag in request.if_none_match:
+            return conditional_json(etag, None, cache_control='public, no-cache')
+
+        product = next((p for p in items if p['_id'] == product_id), None)
+        if product is None:
+            # Out-of-stock products are not in the cached catalog.
+            product = data_access.find_product(db, {"_id": oid}, 'catalog-card')
+        if product is None:
+            return jsonify({'error': 'product not found'}), 404
+        return conditional_json(etag, lambda: {'product': product}, cache_control='public, no-cache')
+
+    @api.route('/orders')
+    @api_login_required
+    def my_orders():
+        per_page = clamp_per_page(request.args.get('per_page'), API_ORDERS_PER_PAGE)
+        cursor = request.args.get('cursor')
+        query = {"user_id": g.api_user_id}
+        page_filter = keyset_filter(cursor, 'order_date')
+        if page_filter:
+            query = {"$and": [query, page_filter]}
+        rows = list(db.orders.find(query, ORDER_LIST_FIELDS)
+                    .sort([("order_date", -1), ("_id", -1)]).limit(per_page + 1))
+        rows, next_page = next_cursor(rows, per_page, 'order_date')
+
+        digest = hashlib.sha1()
+        for o in rows:
+            digest.update(order_version(o).encode())
+        digest.update(str(next_page).encode())
+        return conditional_json(f"orders-{digest.hexdigest()}",
+                                lambda: {'orders': rows, 'next_cursor': next_page})
+
+    @api.route('/orders/<order_id>')
+    @api_login_required
+    def my_order(order_id):
+        try:
+            order = db.orders.find_one({"_id": ObjectId(order_id), "user_id": g.api_user_id},
+                                       ORDER_DETAIL_FIELDS)
+        except Exception:
+            order = None
+        if not order:
+            return jsonify({'error': 'order not found'}), 404
+        etag = "order-" + hashlib.sha1(order_version(order).encode()).hexdigest()
+        return conditional_json(etag, lambda: {'order': order})
+
+    app.register_blueprint(api)
@@ -1,67 +0,0 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
-from flask_pymongo import PyMongo
-import os
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-change-this'
-app.config["MONGO_URI"] = os.environ.get("MONGO_URI")
-    
-
-mongo = PyMongo(app)
-db = mongo.db
-
-# Database Models
-class User(db.Model):
-    __tablename__ = 'users'
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password = db.Column(db.String(255), nullable=False)
-    phone = db.Column(db.String(10), nullable=False)
-    address = db.Column(db.String(255), nullable=False)
-    is_admin = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    orders = db.relationship('Order', backref='user', lazy=True, cascade='all, delete-orphan')
-
-class Product(db.Model):
-    __tablename__ = 'products'
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), nullable=False)
-    description = db.Column(db.String(255))
-    price = db.Column(db.Float, nullable=False)
-    stock = db.Column(db.Integer, default=0)
-    unit = db.Column(db.String(50), default='Liter')  # Liter, kg, piece, etc.
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    order_items = db.relationship('OrderItem', backref='product', lazy=True, cascade='all, delete-orphan')
-
-class Order(db.Model):
-    __tablename__ = 'orders'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    total_amount = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(20), default='Pending')  # Pending, Completed, Cancelled
-    order_date = db.Column(db.DateTime, default=datetime.utcnow)
-    delivery_date = db.Column(db.DateTime)
-    order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
-
-class OrderItem(db.Model):
-    __tablename__ = 'order_items'
-    id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
-    quantity = db.Column(db.Float, nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    subtotal = db.Column(db.Float, nullable=False)
-
-# Create database tables
-with app.app_context():
-    db.create_all()
-
-if __name__ == '__main__':
-    
-    port = int(os.environ.get("PORT", 10000))  # Render provides PORT=10000
-    app.run(host="0.0.0.0", port=port)
-    
\ No newline at end of file
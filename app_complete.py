@@ -2,15 +2,37 @@
 Dairy Management System - MongoDB version (MongoDB-safe)
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-from flask_mail import Mail, Message
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, abort, Response, stream_with_context
+from flask_mail import Mail
 from datetime import datetime, timedelta, timezone
 from functools import wraps
-from flask_pymongo import PyMongo
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+import codecs
 import os
+import re
 import secrets
+import api
+import assets
+import bootstrap
+import catalog_cache
+import checkout
+import dashboard_stats
+import data_access
+import email_outbox
+import exports
+import indexes
+import metrics
+import mongo
+import order_status
+import passwords
+import product_import
+import query_profiler
+import sales_rollup
+import seed_data
+import serializers
+import user_context
+from pagination import clamp_per_page, decode_cursor, id_keyset_filter, keyset_filter, next_cursor, next_id_cursor
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -23,7 +45,7 @@ ENV = os.getenv("ENV", "development")
 if ENV == "production":
     app.config["MONGO_URI"] = os.getenv("MONGO_URI") 
 else:
-    app.config["MONGO_URI"] = "mongodb://127.0.0.1:27017/dairy_management_db"
+    app.config["MONGO_URI"] = os.getenv("MONGO_URI", "mongodb://127.0.0.1:27017/dairy_management_db")
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dairy-management-secret-key-2025')
 
 app.config['JSON_SORT_KEYS'] = False
@@ -38,90 +60,57 @@ app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@dairymanagement.com')
 
-# Initialize Mail and PyMongo
+# Initialize Mail and MongoDB. The client itself is created per process on
+# first use, so a preloaded app can be forked safely (see mongo.py).
 mail = Mail(app)
-mongo_client = PyMongo(app)
-db = mongo_client.db  # shorthand
+mongo_client = mongo.ProcessLocalClient(
+    app.config["MONGO_URI"], event_listeners=metrics.mongo_listeners() + query_profiler.listeners())
+db = mongo_client.database()  # shorthand
+
+ORDER_STATUSES = ['Pending', 'Completed', 'Cancelled']
 
 
 # ----------------- Helpers -----------------
 
-def objid_to_str(doc):
-    """Convert _id ObjectId to string for jsonify/template use."""
-    if not doc:
-        return None
-    doc['_id'] = str(doc['_id'])
-    return doc
+def get_user_by_id(user_id_str, view='auth'):
+    return data_access.get_user(db, user_id_str, view)
 
 
-def convert_products_cursor(cursor):
-    out = []
-    for p in cursor:
-        p['_id'] = str(p['_id'])
-        # keep created_at serializable
-        if 'created_at' in p and isinstance(p['created_at'], datetime):
-            p['created_at'] = p['created_at'].isoformat()
-        out.append(p)
-    return out
+def get_user_by_email(email, view='id'):
+    return data_access.find_user(db, {"email": email}, view)
 
 
-def get_user_by_id(user_id_str):
+def parse_date_arg(value, strict=False):
+    """
+    Parse a YYYY-MM-DD query-string value into a UTC datetime, or None.
+    A malformed value is ignored, or raises ValueError when `strict`.
+    """
+    if not value:
+        return None
     try:
-        return db.users.find_one({"_id": ObjectId(user_id_str)})
-    except Exception:
+        return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        if strict:
+            raise
         return None
 
 
-def get_user_by_email(email):
-    return db.users.find_one({"email": email})
-
-
 # ----------------- Initialization (one-time) -----------------
 
-@app.before_request
-def initialize_db():
-    """
-    Creates an init flag in Mongo and a default admin + sample products the first time.
-    Safe to run repeatedly — it checks existence and won't duplicate.
-    """
-    try:
-        init_flag = db.init_flags.find_one({})
-        if not init_flag:
-            db.init_flags.insert_one({"initialized": False, "created_at": datetime.now(timezone.utc)})
-            init_flag = db.init_flags.find_one({})
-
-        if not init_flag.get("initialized", False):
-            admin_email = 'admin@dairymanagement.com'
-            if not db.users.find_one({"email": admin_email}):
-                print("Initializing default admin user and sample products...")
-
-                admin_user = {
-                    "username": "admin",
-                    "email": admin_email,
-                    "password": generate_password_hash("admin123"),
-                    "phone": "9999999999",
-                    "address": "Dairy Management HQ",
-                    "is_admin": True,
-                    "created_at": datetime.now(timezone.utc),
-                    "reset_token": None,
-                    "reset_token_expiry": None
-                }
-                db.users.insert_one(admin_user)
-
-                sample_products = [
-                    {"name": "Milk (1L)", "description": "Fresh whole milk", "price": 50.0, "stock": 100, "unit": "Liter", "created_at": datetime.now(timezone.utc)},
-                    {"name": "Yogurt (500ml)", "description": "Creamy yogurt", "price": 80.0, "stock": 75, "unit": "ml", "created_at": datetime.now(timezone.utc)},
-                    {"name": "Buttermilk (1L)", "description": "Fresh buttermilk", "price": 40.0, "stock": 50, "unit": "Liter", "created_at": datetime.now(timezone.utc)},
-                    {"name": "Paneer (500g)", "description": "Fresh cottage cheese", "price": 250.0, "stock": 30, "unit": "grams", "created_at": datetime.now(timezone.utc)},
-                    {"name": "Ghee (500ml)", "description": "Pure clarified butter", "price": 500.0, "stock": 20, "unit": "ml", "created_at": datetime.now(timezone.utc)},
-                    {"name": "Cheese (200g)", "description": "Processed cheese", "price": 150.0, "stock": 40, "unit": "grams", "created_at": datetime.now(timezone.utc)},
-                ]
-                db.products.insert_many(sample_products)
-
-            db.init_flags.update_one({"_id": init_flag["_id"]}, {"$set": {"initialized": True, "updated_at": datetime.now(timezone.utc)}})
-            print("Default admin user and sample products created successfully!")
-    except Exception as e:
-        print(f"Initialization error: {str(e)}")
+metrics.init_app(app)
+query_profiler.init_app(app, db)
+assets.init_app(app)
+# Seeding runs once per deployment (see bootstrap.py); requests only check a
+# process-local flag.
+bootstrap.init_app(app, db)
+sales_rollup.init_app(app, db)
+indexes.init_app(app, db)
+email_outbox.init_app(app, db, mail)
+exports.init_app(app, db)
+api.init_app(app, db)
+serializers.init_app(app, db)
+seed_data.init_app(app, db)
+product_import.init_app(app, db)
 
 
 # ----------------- Decorators -----------------
@@ -142,7 +131,7 @@ def admin_required(f):
         if 'user_id' not in session:
             flash('Please login first', 'danger')
             return redirect(url_for('login'))
-        user = get_user_by_id(session['user_id'])
+        user = user_context.current_user(db)
         if not user or not user.get('is_admin', False):
             flash('Admin access required', 'danger')
             return redirect(url_for('user_dashboard') if user else url_for('login'))
@@ -155,7 +144,7 @@ def admin_required(f):
 @app.route('/')
 def index():
     if 'user_id' in session:
-        user = get_user_by_id(session['user_id'])
+        user = user_context.current_user(db)
         if user and user.get('is_admin'):
             return redirect(url_for('admin_dashboard'))
         else:
@@ -176,26 +165,33 @@ def register():
             flash('All fields are required', 'danger')
             return redirect(url_for('register'))
 
-        if db.users.find_one({"username": username}):
+        if data_access.user_exists(db, {"username": username}):
             flash('Username already exists', 'danger')
             return redirect(url_for('register'))
 
-        if db.users.find_one({"email": email}):
+        if data_access.user_exists(db, {"email": email}):
             flash('Email already exists', 'danger')
             return redirect(url_for('register'))
 
         new_user = {
             "username": username,
             "email": email,
-            "password": generate_password_hash(password),
+            "password": passwords.hash_password(password),
             "phone": phone,
             "address": address,
             "is_admin": False,
             "created_at": datetime.now(timezone.utc),
             "reset_token": None,
-            "reset_token_expiry": None
+            "reset_token_expiry": None,
+            "schema_version": serializers.SCHEMA_VERSION
         }
-        db.users.insert_one(new_user)
+        try:
+            db.users.insert_one(new_user)
+        except DuplicateKeyError:
+            # Lost a race with a concurrent registration (unique indexes).
+            flash('Username or email already exists', 'danger')
+            return redirect(url_for('register'))
+        dashboard_stats.invalidate()
         flash('Registration successful! Please login.', 'success')
         return redirect(url_for('login'))
     return render_template('register.html')
@@ -207,8 +203,10 @@ def login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '')
 
-        user = db.users.find_one({"username": username})
-        if user and check_password_hash(user['password'], password):
+        user = data_access.find_user(db, {"username": username}, 'login')
+        if user and passwords.verify_password(user.get('password'), password):
+            if passwords.needs_rehash(user['password']):
+                db.users.update_one({"_id": user['_id']}, {"$set": {"password": passwords.hash_password(password)}})
             session['user_id'] = str(user['_id'])
             session['username'] = user['username']
             session['is_admin'] = user.get('is_admin', False)
@@ -234,101 +232,86 @@ def logout():
 @app.route('/user/dashboard')
 @login_required
 def user_dashboard():
-    user = get_user_by_id(session['user_id'])
+    user = user_context.current_user(db)
     if user and user.get('is_admin'):
         return redirect(url_for('admin_dashboard'))
 
-    products_cursor = db.products.find({"stock": {"$gt": 0}})
-    products = convert_products_cursor(products_cursor)
+    products = catalog_cache.in_stock_products(db)
     return render_template('user_dashboard.html', products=products, user=user)
 
 
 @app.route('/user/place-order', methods=['POST'])
 @login_required
 def place_order():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     items = data.get('items', [])
 
     if not items:
         return jsonify({'success': False, 'message': 'No items selected'}), 400
 
-    total_amount = 0.0
-    order_items = []
+    try:
+        order_doc = checkout.place_order(db.client, db, ObjectId(session['user_id']), items)
+    except checkout.CheckoutError as e:
+        return jsonify({'success': False, 'message': e.message}), 400
+
+    sales_rollup.record_order(db, order_doc['order_date'], order_doc['total_amount'])
+    catalog_cache.bump_version(db)
+    dashboard_stats.invalidate()
+
+    return jsonify({'success': True, 'message': 'Order placed successfully', 'order_id': str(order_doc['_id'])})
 
-    # Validate items and compute totals
-    for item in items:
-        try:
-            prod = db.products.find_one({"_id": ObjectId(item['product_id'])})
-        except Exception:
-            return jsonify({'success': False, 'message': 'Invalid product id'}), 400
-        if not prod:
-            return jsonify({'success': False, 'message': 'Product not found'}), 400
-        if prod.get('stock', 0) < int(item['quantity']):
-            return jsonify({'success': False, 'message': f"Insufficient stock for {prod['name']}"}), 400
-
-        subtotal = float(prod['price']) * float(item['quantity'])
-        total_amount += subtotal
-        order_items.append({
-            "product_id": prod['_id'],            # stored as ObjectId
-            "product_name": prod['name'],
-            "product_unit": prod.get('unit', ''),
-            "quantity": int(item['quantity']),
-            "price": float(prod['price']),
-            "subtotal": subtotal
-        })
-
-    # Create order (store under 'order_items' — consistent across templates)
-    order_doc = {
-        "user_id": ObjectId(session['user_id']),
-        "total_amount": total_amount,
-        "status": "Pending",
-        "order_date": datetime.now(timezone.utc),
-        "delivery_date": datetime.now(timezone.utc) + timedelta(days=1),
-        "order_items": order_items
-    }
-    order_result = db.orders.insert_one(order_doc)
-
-    db.users.update_one(
-    {"_id": ObjectId(session['user_id'])},
-    {"$inc": {"total_orders": 1}}
-)
-
-
-    # Update product stock (decrement)
-    for it in order_items:
-        db.products.update_one({"_id": it['product_id']}, {"$inc": {"stock": -int(it['quantity'])}})
-
-    return jsonify({'success': True, 'message': 'Order placed successfully', 'order_id': str(order_result.inserted_id)})
+
+USER_ORDERS_PER_PAGE = 20
+
+# Only the fields user_orders.html displays.
+USER_ORDER_LIST_FIELDS = {"order_date": 1, "total_amount": 1, "status": 1, "delivery_date": 1}
+
+
+def load_user_orders_page(user_id, cursor, per_page):
+    """One page of a customer's orders, newest first, plus the next-page cursor."""
+    query = {"user_id": user_id}
+    page_filter = keyset_filter(cursor, 'order_date')
+    if page_filter:
+        query = {"$and": [query, page_filter]}
+    orders_cursor = db.orders.find(query, USER_ORDER_LIST_FIELDS) \
+        .sort([("order_date", -1), ("_id", -1)]).limit(per_page + 1)
+    orders, next_page = next_cursor(list(orders_cursor), per_page, 'order_date')
+    return serializers.orders(orders), next_page
 
 
 @app.route('/user/orders')
 @login_required
 def user_orders():
-    user = get_user_by_id(session['user_id'])
-    orders_cursor = db.orders.find({"user_id": ObjectId(session['user_id'])}).sort("order_date", -1)
-    orders = []
-    for o in orders_cursor:
-        o['_id'] = str(o['_id'])
-        # Ensure order_items exists and convert inner ObjectIds to strings for template convenience
-        if o.get('order_items') is None:
-            o['order_items'] = []
-        for it in o['order_items']:
-            if isinstance(it.get('product_id'), ObjectId):
-                it['product_id'] = str(it['product_id'])
-        # Leave datetimes as datetimes so Jinja's strftime works.
-        # If they are strings (older orders), try to parse ISO format
-        if isinstance(o.get('order_date'), str):
-            try:
-                o['order_date'] = datetime.fromisoformat(o['order_date'])
-            except:
-                pass
-        if isinstance(o.get('delivery_date'), str) and o['delivery_date']:
-            try:
-                o['delivery_date'] = datetime.fromisoformat(o['delivery_date'])
-            except:
-                pass
-        orders.append(o)
-    return render_template('user_orders.html', orders=orders, user=user)
+    user = user_context.current_user(db)
+    per_page = clamp_per_page(request.args.get('per_page'), USER_ORDERS_PER_PAGE)
+    orders, next_page = load_user_orders_page(ObjectId(session['user_id']), None, per_page)
+    return render_template('user_orders.html', orders=orders, user=user, next_cursor=next_page)
+
+
+@app.route('/user/orders/more')
+@login_required
+def user_orders_more():
+    """JSON "load more" endpoint for the order history page."""
+    cursor = request.args.get('cursor')
+    if decode_cursor(cursor) is None:
+        return jsonify({'error': 'missing or invalid cursor'}), 400
+    per_page = clamp_per_page(request.args.get('per_page'), USER_ORDERS_PER_PAGE)
+    orders, next_page = load_user_orders_page(ObjectId(session['user_id']), cursor, per_page)
+
+    def fmt(value, pattern):
+        return value.strftime(pattern) if isinstance(value, datetime) else None
+
+    return jsonify({
+        'orders': [{
+            'id': o['_id'],
+            'order_date': fmt(o.get('order_date'), '%d-%m-%Y %H:%M'),
+            'total_amount': o.get('total_amount'),
+            'status': o.get('status'),
+            'delivery_date': fmt(o.get('delivery_date'), '%d-%m-%Y'),
+            'receipt_url': url_for('user_receipt', order_id=o['_id']),
+        } for o in orders],
+        'next_cursor': next_page,
+    })
 
 
 @app.route('/user/receipt/<order_id>')
@@ -349,31 +332,7 @@ def user_receipt(order_id):
         flash('Unauthorized access', 'danger')
         return redirect(url_for('user_orders'))
 
-    # Convert for template
-    order['_id'] = str(order['_id'])
-
-    # Ensure order_items exists
-    order['order_items'] = order.get('order_items', [])
-
-    # Parse product_id for template
-    for it in order['order_items']:
-        if isinstance(it.get('product_id'), ObjectId):
-            it['product_id'] = str(it['product_id'])
-
-    # Convert timestamps
-    if isinstance(order.get('order_date'), str):
-        try:
-            order['order_date'] = datetime.fromisoformat(order['order_date'])
-        except:
-            order['order_date'] = datetime.now()
-
-    if isinstance(order.get('delivery_date'), str):
-        try:
-            order['delivery_date'] = datetime.fromisoformat(order['delivery_date'])
-        except:
-            pass
-
-    return render_template("receipt.html", order=order)
+    return render_template("receipt.html", order=serializers.order(order))
 
 
 
@@ -382,69 +341,16 @@ def user_receipt(order_id):
 @app.route('/admin/dashboard')
 @admin_required
 def admin_dashboard():
-    total_products = db.products.count_documents({})
-    total_users = db.users.count_documents({"is_admin": False})
-    total_orders = db.orders.count_documents({})
-    # total revenue using aggregation
-    agg = db.orders.aggregate([{"$group": {"_id": None, "total": {"$sum": "$total_amount"}}}])
-    total_revenue = 0.0
-    for r in agg:
-        total_revenue = r.get('total', 0.0)
-
-    recent_orders_cursor = db.orders.find().sort("order_date", -1).limit(10)
-    recent_orders = []
-    for o in recent_orders_cursor:
-        o['_id'] = str(o['_id'])
-
-        # Attach user dict (if available)
-        user = None
-        try:
-            # order['user_id'] is an ObjectId in DB; handle string/objid safely
-            user_obj = o.get('user_id')
-            if isinstance(user_obj, ObjectId):
-                user = db.users.find_one({"_id": user_obj})
-            else:
-                # attempt to convert string id to ObjectId
-                try:
-                    user = db.users.find_one({"_id": ObjectId(str(user_obj))})
-                except:
-                    user = None
-        except Exception:
-            user = None
-
-        if user:
-            user['_id'] = str(user['_id'])
-            # keep only safe fields
-            o['user'] = {
-                "username": user.get('username', 'Unknown'),
-                "email": user.get('email', ''),
-                "phone": user.get('phone', '')
-            }
-        else:
-            o['user'] = None
-
-        # Try to keep order_date as datetime for template strftime
-        if isinstance(o.get('order_date'), str):
-            try:
-                o['order_date'] = datetime.fromisoformat(o['order_date'])
-            except:
-                pass
-
-        recent_orders.append(o)
-
-    return render_template('admin_dashboard.html',
-                           total_products=total_products,
-                           total_users=total_users,
-                           total_orders=total_orders,
-                           total_revenue=total_revenue,
-                           recent_orders=recent_orders)
+    stats = dashboard_stats.get_snapshot(db)
+    return render_template('admin_dashboard.html', cache_info=dashboard_stats.cache_info(),
+                           catalog_cache_info=catalog_cache.cache_info(),
+                           user_cache_info=user_context.cache_info(), **stats)
 
 
 @app.route('/admin/products')
 @admin_required
 def admin_products():
-    products_cursor = db.products.find()
-    products = convert_products_cursor(products_cursor)
+    products = serializers.products(data_access.find_products(db, {}, 'catalog-card'))
     return render_template('admin_products.html', products=products)
 
 
@@ -475,15 +381,14 @@ def add_product():
             "price": price,
             "stock": stock,
             "unit": unit,
-            "created_at": datetime.now(timezone.utc)
+            "created_at": datetime.now(timezone.utc),
+            "schema_version": serializers.SCHEMA_VERSION
         }
         db.products.insert_one(new_product)
+        catalog_cache.bump_version(db)
+        dashboard_stats.invalidate()
         flash('Product added successfully', 'success')
         return redirect(url_for('admin_products'))
-    products = list(db.products.find())
-    for p in products:
-        p["_id"] = str(p["_id"])
-
     return render_template('add_product.html')
 
 
@@ -491,7 +396,7 @@ def add_product():
 @admin_required
 def edit_product(product_id):
     try:
-        product = db.products.find_one({"_id": ObjectId(product_id)})
+        product = data_access.find_product(db, {"_id": ObjectId(product_id)}, 'catalog-card')
     except Exception:
         flash('Invalid product id', 'danger')
         return redirect(url_for('admin_products'))
@@ -518,14 +423,36 @@ def edit_product(product_id):
             "stock": stock,
             "unit": unit
         }})
+        catalog_cache.bump_version(db)
+        dashboard_stats.invalidate()
         flash('Product updated successfully', 'success')
         return redirect(url_for('admin_products'))
 
-    # prepare product for template
-    product['_id'] = str(product['_id'])
-    if isinstance(product.get('created_at'), datetime):
-        product['created_at'] = product['created_at'].isoformat()
-    return render_template('edit_product.html', product=product)
+    return render_template('edit_product.html', product=serializers.product(product))
+
+
+@app.route('/admin/products/import', methods=['GET', 'POST'])
+@admin_required
+def import_products():
+    report, stock_mode, dry_run = None, 'set', False
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Choose a CSV file to import', 'danger')
+            return redirect(url_for('import_products'))
+        stock_mode = request.form.get('stock_mode', 'set')
+        if stock_mode not in product_import.STOCK_MODES:
+            stock_mode = 'set'
+        dry_run = bool(request.form.get('dry_run'))
+        try:
+            report = product_import.import_products(
+                db, codecs.iterdecode(upload.stream, 'utf-8-sig'), stock_mode, dry_run).as_dict()
+        except UnicodeDecodeError:
+            flash('The file is not UTF-8 encoded CSV', 'danger')
+            return redirect(url_for('import_products'))
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(report)
+    return render_template('import_products.html', report=report, stock_mode=stock_mode, dry_run=dry_run)
 
 
 @app.route('/admin/product/delete/<product_id>', methods=['POST'])
@@ -533,6 +460,8 @@ def edit_product(product_id):
 def delete_product(product_id):
     try:
         db.products.delete_one({"_id": ObjectId(product_id)})
+        catalog_cache.bump_version(db)
+        dashboard_stats.invalidate()
         flash('Product deleted successfully', 'success')
     except Exception:
         flash('Invalid product id', 'danger')
@@ -542,98 +471,200 @@ def delete_product(product_id):
 @app.route('/admin/orders')
 @admin_required
 def admin_orders():
-    orders_cursor = db.orders.find().sort("order_date", -1)
-    orders = []
-
-    for o in orders_cursor:
-        o['_id'] = str(o['_id'])
-        o['user_id'] = str(o['user_id'])
-
-        # Convert dates
-        if isinstance(o.get('order_date'), datetime):
-            pass
-        elif isinstance(o.get('order_date'), str):
-            try:
-                o['order_date'] = datetime.fromisoformat(o['order_date'])
-            except:
-                o['order_date'] = datetime.now()
-
-        # 🟩 FIX: ensure order_items exists
-        o['order_items'] = o.get('order_items', [])
-
-        # Fetch user info
-        user = db.users.find_one({"_id": ObjectId(o['user_id'])})
-        if user:
-            user['_id'] = str(user['_id'])
-        o['user_data'] = user
-
-        orders.append(o)
-
-    return render_template('admin_orders.html', orders=orders)
-
+    status = request.args.get('status', '')
+    date_from = parse_date_arg(request.args.get('from'))
+    date_to = parse_date_arg(request.args.get('to'))
+    cursor = request.args.get('cursor')
+    per_page = clamp_per_page(request.args.get('per_page'))
+
+    match = {}
+    if status in ORDER_STATUSES:
+        match['status'] = status
+    if date_from or date_to:
+        match['order_date'] = {}
+        if date_from:
+            match['order_date']['$gte'] = date_from
+        if date_to:
+            match['order_date']['$lt'] = date_to + timedelta(days=1)
+    page_filter = keyset_filter(cursor, 'order_date')
+    if page_filter:
+        match = {"$and": [match, page_filter]}
+
+    # One round trip: page of orders joined to only the user fields shown.
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"order_date": -1, "_id": -1}},
+        {"$limit": per_page + 1},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": data_access.USER_PROJECTIONS['contact']}],
+            "as": "user_data",
+        }},
+        {"$project": {
+            "total_amount": 1,
+            "status": 1,
+            "order_date": 1,
+            "order_items": {"$ifNull": ["$order_items", []]},
+            "user_data": {"$arrayElemAt": ["$user_data", 0]},
+        }},
+    ]
+    orders, next_page = next_cursor(list(db.orders.aggregate(pipeline)), per_page, 'order_date')
+    serializers.orders(orders)
+
+    filters = {k: v for k, v in {
+        'status': status if status in ORDER_STATUSES else '',
+        'from': request.args.get('from', '') if date_from else '',
+        'to': request.args.get('to', '') if date_to else '',
+    }.items() if v}
+    return render_template('admin_orders.html', orders=orders, filters=filters,
+                           statuses=ORDER_STATUSES, transitions=order_status.TRANSITIONS,
+                           next_cursor=next_page, is_first_page=not cursor)
+
+
+
+def admin_orders_return_url():
+    """Send the admin back to the filtered/paged orders view they came from."""
+    next_url = request.form.get('next', '')
+    if next_url.startswith('/admin/orders'):
+        return next_url
+    return url_for('admin_orders')
 
 
 @app.route('/admin/order/<order_id>/status', methods=['POST'])
 @admin_required
 def update_order_status(order_id):
     status = request.form.get('status', 'Pending')
-    if status not in ['Pending', 'Completed', 'Cancelled']:
+    if status not in ORDER_STATUSES:
         flash('Invalid status', 'danger')
-        return redirect(url_for('admin_orders'))
-    try:
-        db.orders.update_one({"_id": ObjectId(order_id)}, {"$set": {"status": status}})
+        return redirect(admin_orders_return_url())
+    result = order_status.change_status(db, [order_id], status)
+    if result['updated']:
         flash('Order status updated', 'success')
-    except Exception:
-        flash('Invalid order id', 'danger')
-    return redirect(url_for('admin_orders'))
+    else:
+        reason = result['skipped'][0][1]
+        if reason == 'not found':
+            flash('Order not found', 'danger')
+        elif reason == 'invalid id':
+            flash('Invalid order id', 'danger')
+        else:
+            flash(f'Invalid transition: {reason}', 'danger')
+    return redirect(admin_orders_return_url())
+
+
+@app.route('/admin/orders/status', methods=['POST'])
+@admin_required
+def batch_update_order_status():
+    status = request.form.get('status', '')
+    order_ids = request.form.getlist('order_ids')
+    if status not in ORDER_STATUSES:
+        flash('Invalid status', 'danger')
+    elif not order_ids:
+        flash('Select at least one order', 'danger')
+    elif len(set(order_ids)) > order_status.MAX_BATCH:
+        flash(f"Select at most {order_status.MAX_BATCH} orders at a time", 'danger')
+    else:
+        result = order_status.change_status(db, order_ids, status)
+        flash(f"{result['updated']} order(s) marked {status}", 'success' if result['updated'] else 'danger')
+        if result['skipped']:
+            flash(f"{len(result['skipped'])} order(s) skipped: "
+                  + "; ".join(f"#{oid} {reason}" for oid, reason in result['skipped'][:5])
+                  + (" ..." if len(result['skipped']) > 5 else ""), 'warning')
+    return redirect(admin_orders_return_url())
+
+
+@app.route('/admin/orders/complete-delivery', methods=['POST'])
+@admin_required
+def complete_delivery_date():
+    day = parse_date_arg(request.form.get('delivery_date'))
+    if not day:
+        flash('Choose a delivery date', 'danger')
+    else:
+        count = order_status.complete_for_delivery_date(db, day)
+        flash(f"{count} pending order(s) for delivery on {day.strftime('%d-%m-%Y')} marked Completed", 'success')
+    return redirect(admin_orders_return_url())
 
 
 @app.route('/admin/users')
 @admin_required
 def admin_users():
-    users = list(db.users.find())
+    q = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor')
+    per_page = clamp_per_page(request.args.get('per_page'))
+
+    query = {}
+    if q:
+        # Anchored prefix match so the username/email/phone indexes can be used.
+        # It is case-sensitive: an "i" flag, or a collation the indexes don't
+        # share, would scan every key instead of a range.
+        prefix = {"$regex": "^" + re.escape(q)}
+        query["$or"] = [{"username": prefix}, {"email": prefix}, {"phone": prefix}]
+    page_filter = id_keyset_filter(cursor)
+    if page_filter:
+        query = {"$and": [query, page_filter]} if query else page_filter
+
+    users_cursor = data_access.find_users(db, query, 'display').sort("_id", -1).limit(per_page + 1)
+    users, next_page = next_id_cursor(list(users_cursor), per_page)
+
+    # Order count, lifetime spend and last order date for this page in one $group.
+    stats = {}
+    if users:
+        for row in db.orders.aggregate([
+            {"$match": {"user_id": {"$in": [u["_id"] for u in users]}}},
+            {"$group": {
+                "_id": "$user_id",
+                "order_count": {"$sum": 1},
+                "lifetime_spend": {"$sum": {"$cond": [{"$eq": ["$status", "Cancelled"]}, 0, "$total_amount"]}},
+                "last_order_date": {"$max": "$order_date"},
+            }},
+        ]):
+            stats[row["_id"]] = row
 
     for user in users:
-        # Convert ObjectId to string
-        user["_id"] = str(user["_id"])
-
-        # Convert created_at
-        created_at = user.get("created_at")
-        if isinstance(created_at, str):
-            try:
-                user["created_at"] = datetime.fromisoformat(created_at)
-            except ValueError:
-                try:
-                    user["created_at"] = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
-                except:
-                    pass
-
-        # ---- FIX: Count orders for this user ----
-        user_orders = list(db.orders.find({"user_id": user["_id"]}))
-        user["orders"] = user_orders  # this makes user.orders|length work
+        row = stats.get(user["_id"], {})
+        user["order_count"] = row.get("order_count", 0)
+        user["lifetime_spend"] = row.get("lifetime_spend", 0.0)
+        user["last_order_date"] = row.get("last_order_date")
+        serializers.user(user)
 
-    return render_template('admin_users.html', users=users)
+    return render_template('admin_users.html', users=users, q=q,
+                           next_cursor=next_page, is_first_page=not cursor)
 
 
 
 @app.route('/admin/reports')
 @admin_required
 def admin_reports():
-    orders_cursor = db.orders.find()
-    products_cursor = db.products.find()
-
-    # daily sales
-    daily_sales = {}
-    for order in orders_cursor:
-        date = order['order_date'].date() if isinstance(order.get('order_date'), datetime) else None
-        if date:
-            daily_sales[date] = daily_sales.get(date, 0) + float(order.get('total_amount', 0))
+    try:
+        days = max(1, min(int(request.args.get('days', 30)), 366))
+    except ValueError:
+        days = 30
 
-    products = convert_products_cursor(products_cursor)
+    daily_sales = sales_rollup.recent_days(db, days)
+    totals = sales_rollup.totals(db)
+    products = serializers.products(data_access.find_products(db, {}, 'inventory'))
     return render_template('admin_reports.html',
                            daily_sales=daily_sales,
-                           products=products,
-                           orders=list(db.orders.find()))
+                           days=days,
+                           totals=totals,
+                           products=products)
+
+
+@app.route('/admin/export/<dataset>.<fmt>')
+@admin_required
+def admin_export(dataset, fmt):
+    if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+        abort(404)
+    try:
+        date_from = parse_date_arg(request.args.get('from'), strict=True)
+        date_to = parse_date_arg(request.args.get('to'), strict=True)
+    except ValueError as e:
+        # Silently exporting everything would look like a successful filtered export.
+        return jsonify({'error': f"invalid date: {e}"}), 400
+    chunks = exports.stream(db, dataset, fmt, date_from, date_to)
+    return Response(stream_with_context(chunks), mimetype=exports.FORMATS[fmt],
+                    headers={"Content-Disposition": f'attachment; filename="{dataset}.{fmt}"'})
 
 
 @app.route('/admin/reset-password', methods=['GET', 'POST'])
@@ -644,8 +675,8 @@ def admin_reset_password():
         new_password = request.form.get('new_password', '')
         confirm_password = request.form.get('confirm_password', '')
 
-        user = get_user_by_id(session['user_id'])
-        if not user or not check_password_hash(user['password'], old_password):
+        user = get_user_by_id(session['user_id'], 'password')
+        if not user or not passwords.verify_password(user.get('password'), old_password):
             flash('Old password is incorrect', 'danger')
             return redirect(url_for('admin_reset_password'))
 
@@ -657,7 +688,8 @@ def admin_reset_password():
             flash('Password must be at least 6 characters', 'danger')
             return redirect(url_for('admin_reset_password'))
 
-        db.users.update_one({"_id": ObjectId(session['user_id'])}, {"$set": {"password": generate_password_hash(new_password)}})
+        db.users.update_one({"_id": ObjectId(session['user_id'])}, {"$set": {"password": passwords.hash_password(new_password)}})
+        user_context.invalidate(session['user_id'])
         flash('Password changed successfully! Please login again.', 'success')
         return redirect(url_for('logout'))
 
@@ -667,12 +699,14 @@ def admin_reset_password():
 # ----------------- Password reset email -----------------
 
 def send_password_reset_email(user_email, reset_token):
+    """Queue the reset email for the outbox worker; the request never waits on SMTP."""
     try:
         reset_link = url_for('reset_password', token=reset_token, _external=True)
-        msg = Message(
-            subject='Dairy Management - Password Reset Request',
-            recipients=[user_email],
-            html=f'''
+        email_outbox.enqueue(
+            db,
+            user_email,
+            'Dairy Management - Password Reset Request',
+            f'''
             <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
               <div style="background: linear-gradient(135deg, #2d5016 0%, #52b788 100%); padding: 20px; text-align: center; color: white; border-radius: 8px 8px 0 0;">
                 <h1 style="margin: 0;">Dairy Management System</h1>
@@ -690,10 +724,9 @@ def send_password_reset_email(user_email, reset_token):
             </div>
             '''
         )
-        mail.send(msg)
         return True
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
+        print(f"Error queueing email: {str(e)}")
         return False
 
 
@@ -701,7 +734,7 @@ def send_password_reset_email(user_email, reset_token):
 def forgot_password():
     if request.method == 'POST':
         email = request.form.get('email', '').strip()
-        user = db.users.find_one({"email": email})
+        user = get_user_by_email(email)
 
         if user:
             reset_token = secrets.token_urlsafe(32)
@@ -722,7 +755,7 @@ def forgot_password():
 
 @app.route('/reset-password/<token>', methods=['GET', 'POST'])
 def reset_password(token):
-    user = db.users.find_one({"reset_token": token})
+    user = data_access.find_user(db, {"reset_token": token}, 'reset')
     if not user or user.get('reset_token_expiry') is None or user['reset_token_expiry'] < datetime.now(timezone.utc):
         flash('Invalid or expired reset link', 'danger')
         return redirect(url_for('login'))
@@ -737,7 +770,8 @@ def reset_password(token):
             flash('Password must be at least 6 characters', 'danger')
             return redirect(url_for('reset_password', token=token))
 
-        db.users.update_one({"_id": user['_id']}, {"$set": {"password": generate_password_hash(new_password), "reset_token": None, "reset_token_expiry": None}})
+        db.users.update_one({"_id": user['_id']}, {"$set": {"password": passwords.hash_password(new_password), "reset_token": None, "reset_token_expiry": None}})
+        user_context.invalidate(user['_id'])
         flash('Password reset successfully! Please login with your new password.', 'success')
         return redirect(url_for('login'))
 
@@ -751,6 +785,12 @@ def not_found(error):
     return render_template('404.html'), 404
 
 
+@app.errorhandler(passwords.PasswordBusy)
+def password_pool_busy(error):
+    flash('The server is busy right now. Please try again in a moment.', 'warning')
+    return redirect(request.path)
+
+
 @app.errorhandler(500)
 def server_error(error):
     return render_template('500.html'), 500
@@ -0,0 +1,153 @@
+"""
+Static asset pipeline.
+
+Stylesheets and scripts live in static/src. The build step copies each one to
+static/dist under a content-hashed name, writes gzip (and, when the optional
+`brotli` package is installed, brotli) variants next to it, and records the
+mapping in static/dist/manifest.json:
+
+    python assets.py
+
+Templates reference assets with `asset_url('base.css')`. Hashed files are
+served from /assets/ with far-future immutable cache headers, picking the
+precompressed variant the browser accepts. Dynamic HTML responses are
+gzipped on the fly.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants are always built
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BASE_DIR, 'static', 'src')
+DIST_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+COMPRESSIBLE_TYPES = ('text/html',)
+MIN_COMPRESS_BYTES = 1024
+
+_manifest = None
+
+
+def _write_atomic(path, data):
+    # Several workers may build at once; readers must never see a partial file.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build():
+    """Fingerprint and precompress every source asset. Returns the manifest."""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    for name in sorted(os.listdir(SRC_DIR)):
+        with open(os.path.join(SRC_DIR, name), 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        path = os.path.join(DIST_DIR, hashed)
+        _write_atomic(path, data)
+        _write_atomic(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_atomic(path + '.br', brotli.compress(data, quality=11))
+        manifest[name] = hashed
+    _write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _is_stale(manifest):
+    """True if static/src gained or lost files, or changed, since the manifest was written."""
+    sources = os.listdir(SRC_DIR)
+    if set(sources) != set(manifest):
+        return True
+    built_at = os.path.getmtime(MANIFEST_PATH)
+    return any(os.path.getmtime(os.path.join(SRC_DIR, name)) > built_at for name in sources)
+
+
+def load_manifest():
+    """Read the manifest, rebuilding it when it is missing or older than static/src."""
+    global _manifest
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if manifest is None or _is_stale(manifest):
+        manifest = build()
+    _manifest = manifest
+    return _manifest
+
+
+def asset_url(name):
+    if _manifest is None:
+        load_manifest()
+    hashed = _manifest.get(name)
+    if hashed is None:
+        # Added to static/src since the last build: serve it unhashed.
+        return url_for('static', filename='src/' + name)
+    return url_for('hashed_asset', filename=hashed)
+
+
+def _accepts(encoding):
+    return encoding in request.accept_encodings
+
+
+def serve_asset(filename):
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if _accepts(candidate) and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+            encoding, filename = candidate, filename + suffix
+            break
+    resp = send_from_directory(DIST_DIR, filename, mimetype=mimetype, max_age=31536000)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    resp.headers['Cache-Control'] = IMMUTABLE
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+
+def compress_response(response):
+    """gzip dynamic HTML for clients that accept it."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or not _accepts('gzip')):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    load_manifest()
+    app.add_url_rule('/assets/<path:filename>', 'hashed_asset', serve_asset)
+    app.after_request(compress_response)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Fingerprint and precompress static assets."""
+        for name, hashed in build().items():
+            print(f"{name} -> {hashed}")
+
+
+if __name__ == '__main__':
+    for name, hashed in build().items():
+        print(f"{name} -> {hashed}")
@@ -0,0 +1,230 @@
+"""
+Asyncio tier for the read-heavy JSON API.
+
+Serves the same read-only /api/v1 endpoints as api.py (catalog, one
+product, my orders, one order's status) on Starlette with PyMongo's
+AsyncMongoClient. A request waiting on MongoDB parks a coroutine instead of
+holding a whole gunicorn worker, so one process can keep many polling
+clients in flight.
+
+It runs side by side with the Flask app on the same database, under uvicorn:
+
+    uvicorn async_api:app --host 0.0.0.0 --port 8001 --workers 2
+
+with the reverse proxy sending GET /api/v1/* here and everything else to
+gunicorn. Response bodies and ETags are the ones api.py produces (same
+projections and encoder), and the customer is taken from the Flask
+session cookie, which is verified with the same SECRET_KEY. Logins and
+all writes stay on the Flask app.
+
+Each uvicorn worker opens its own client on startup. ASYNC_MONGO_MAX_POOL_SIZE
+(default 50) caps its connections; the other MONGO_* settings are shared with
+mongo.py.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from functools import wraps
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from flask.sessions import SecureCookieSessionInterface
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from pymongo import AsyncMongoClient
+from pymongo.uri_parser import parse_uri
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.http import parse_etags, quote_etag
+
+import api
+import catalog_cache
+import data_access
+import mongo
+from pagination import clamp_per_page, keyset_filter, next_cursor
+
+load_dotenv()
+
+ENV = os.getenv("ENV", "development")
+
+if ENV == "production":
+    MONGO_URI = os.getenv("MONGO_URI")
+else:
+    MONGO_URI = os.getenv("MONGO_URI", "mongodb://127.0.0.1:27017/dairy_management_db")
+SECRET_KEY = os.environ.get('SECRET_KEY', 'dairy-management-secret-key-2025')
+MAX_POOL_SIZE = int(os.environ.get('ASYNC_MONGO_MAX_POOL_SIZE', 50))
+
+# Must match app_complete's session settings.
+SESSION_COOKIE_NAME = 'session'
+SESSION_LIFETIME = timedelta(days=7)
+
+_session_interface = SecureCookieSessionInterface()
+_session_serializer = URLSafeTimedSerializer(
+    SECRET_KEY, salt=_session_interface.salt, serializer=_session_interface.serializer,
+    signer_kwargs={"key_derivation": _session_interface.key_derivation,
+                   "digest_method": _session_interface.digest_method})
+
+
+def session_user_id(request):
+    """The logged-in user's id from the Flask session cookie, or None."""
+    cookie = request.cookies.get(SESSION_COOKIE_NAME)
+    if not cookie:
+        return None
+    try:
+        data = _session_serializer.loads(cookie, max_age=int(SESSION_LIFETIME.total_seconds()))
+    except BadSignature:
+        return None
+    return data.get('user_id')
+
+
+def json_error(message, status):
+    return Response(api.dumps({'error': message}), status_code=status, media_type='application/json')
+
+
+def conditional_json(request, etag, build, cache_control='private, no-cache'):
+    """api.conditional_json for Starlette requests."""
+    headers = {'ETag': quote_etag(etag), 'Cache-Control': cache_control}
+    if etag in parse_etags(request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=headers)
+    return Response(api.dumps(build()), media_type='application/json', headers=headers)
+
+
+def login_required(endpoint):
+    @wraps(endpoint)
+    async def decorated_function(request):
+        user_id = session_user_id(request)
+        if user_id is None:
+            return json_error('authentication required', 401)
+        try:
+            request.state.user_id = ObjectId(user_id)
+        except (InvalidId, TypeError):
+            return json_error('authentication required', 401)
+        return await endpoint(request)
+    return decorated_function
+
+
+class CatalogCache:
+    """
+    catalog_cache.snapshot for the event loop: the same `meta` version,
+    revalidation windows and content tag, with one rebuild at a time per process.
+    """
+
+    def __init__(self):
+        self.products = None
+        self.version = None
+        self.tag = None
+        self.built_at = 0.0
+        self.checked_at = 0.0
+        self._rebuild_lock = asyncio.Lock()
+
+    async def _read_version(self, db):
+        doc = await db.meta.find_one({"_id": catalog_cache.META_ID}, {"version": 1})
+        return doc.get("version", 0) if doc else 0
+
+    async def snapshot(self, db):
+        now = time.monotonic()
+        fresh = self.products is not None and now - self.built_at < catalog_cache.MAX_AGE_SECONDS
+        if fresh and now - self.checked_at < catalog_cache.REVALIDATE_SECONDS:
+            return self.tag, self.products
+
+        version = await self._read_version(db)
+        if fresh and version == self.version:
+            self.checked_at = time.monotonic()
+            return self.tag, self.products
+
+        async with self._rebuild_lock:
+            if self.products is not None and self.version == version and self.built_at >= now:
+                return self.tag, self.products  # rebuilt while we waited
+            cursor = db.products.find({"stock": {"$gt": 0}}, data_access.PRODUCT_PROJECTIONS['catalog-card'])
+            products = [dict(p, _id=str(p['_id'])) async for p in cursor]
+            tag = catalog_cache.content_tag(version, products)
+            self.products, self.version, self.tag = products, version, tag
+            self.built_at = self.checked_at = time.monotonic()
+        return tag, products
+
+
+catalog = CatalogCache()
+
+
+async def products(request):
+    tag, items = await catalog.snapshot(request.app.state.db)
+    return conditional_json(request, f"catalog-{tag}", lambda: {'products': items},
+                            cache_control='public, no-cache')
+
+
+async def product(request):
+    db = request.app.state.db
+    product_id = request.path_params['product_id']
+    try:
+        oid = ObjectId(product_id)
+    except Exception:
+        return json_error('invalid product id', 404)
+    tag, items = await catalog.snapshot(db)
+    etag = f"catalog-{tag}-{product_id}"
+    if etag in parse_etags(request.headers.get('if-none-match')):
+        return conditional_json(request, etag, None, cache_control='public, no-cache')
+
+    found = next((p for p in items if p['_id'] == product_id), None)
+    if found is None:
+        # Out-of-stock products are not in the cached catalog.
+        found = await db.products.find_one({"_id": oid}, data_access.PRODUCT_PROJECTIONS['catalog-card'])
+    if found is None:
+        return json_error('product not found', 404)
+    return conditional_json(request, etag, lambda: {'product': found}, cache_control='public, no-cache')
+
+
+@login_required
+async def my_orders(request):
+    per_page = clamp_per_page(request.query_params.get('per_page'), api.API_ORDERS_PER_PAGE)
+    query = {"user_id": request.state.user_id}
+    page_filter = keyset_filter(request.query_params.get('cursor'), 'order_date')
+    if page_filter:
+        query = {"$and": [query, page_filter]}
+    rows = await (request.app.state.db.orders.find(query, api.ORDER_LIST_FIELDS)
+                  .sort([("order_date", -1), ("_id", -1)]).limit(per_page + 1).to_list())
+    rows, next_page = next_cursor(rows, per_page, 'order_date')
+
+    digest = hashlib.sha1()
+    for o in rows:
+        digest.update(api.order_version(o).encode())
+    digest.update(str(next_page).encode())
+    return conditional_json(request, f"orders-{digest.hexdigest()}",
+                            lambda: {'orders': rows, 'next_cursor': next_page})
+
+
+@login_required
+async def my_order(request):
+    try:
+        order = await request.app.state.db.orders.find_one(
+            {"_id": ObjectId(request.path_params['order_id']), "user_id": request.state.user_id},
+            api.ORDER_DETAIL_FIELDS)
+    except Exception:
+        order = None
+    if not order:
+        return json_error('order not found', 404)
+    etag = "order-" + hashlib.sha1(api.order_version(order).encode()).hexdigest()
+    return conditional_json(request, etag, lambda: {'order': order})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # One client per uvicorn worker, created inside the worker's event loop.
+    client = AsyncMongoClient(MONGO_URI, **dict(mongo.client_options(), maxPoolSize=MAX_POOL_SIZE))
+    app.state.db = client[parse_uri(MONGO_URI)["database"]]
+    try:
+        yield
+    finally:
+        await client.close()
+
+
+app = Starlette(routes=[
+    Route('/api/v1/products', products),
+    Route('/api/v1/products/{product_id}', product),
+    Route('/api/v1/orders', my_orders),
+    Route('/api/v1/orders/{order_id}', my_order),
+], lifespan=lifespan)
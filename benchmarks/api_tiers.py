@@ -0,0 +1,287 @@
+"""
+Sync vs async benchmark for the read-only JSON API.
+
+Seeds the http_load dataset into a scratch database, then serves /api/v1
+twice on the same data: from gunicorn (`wsgi:app`, sync workers by default)
+and from uvicorn (`async_api:app`) with the same number of worker processes.
+Each concurrency level drives the same mix of catalog, product, my-orders
+and order-status reads against both and reports requests/sec and p50/p95/p99
+latency side by side:
+
+    python benchmarks/api_tiers.py --concurrency 32,128,512 --duration 30 -o tiers.json
+
+Load is generated from several client processes so the client is not the
+bottleneck; keep --client-processes below the spare cores of the machine.
+The scratch database is dropped afterwards unless --keep-data is given.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+from pymongo import MongoClient
+
+import http_load
+
+ROOT = http_load.ROOT
+
+# Relative weight of each endpoint in the traffic mix.
+TRAFFIC_MIX = {
+    "products": 40,
+    "product": 15,
+    "my_orders": 25,
+    "order_status": 20,
+}
+
+
+# ----------------- Servers -----------------
+
+def wait_ready(proc, url, name):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{name} exited during startup")
+        try:
+            if requests.get(f"{url}/api/v1/products", timeout=2).status_code == 200:
+                return url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"{name} did not become ready within 60s")
+
+
+def start_servers(mongo_uri, sync_port, async_port, workers, worker_class):
+    env = dict(os.environ, MONGO_URI=mongo_uri, GUNICORN_WORKER_CLASS=worker_class,
+               QUERY_PROFILER='0')
+    env.pop("ENV", None)  # development config: plain-HTTP session cookies
+    servers = {
+        "sync": subprocess.Popen(
+            ["gunicorn", "wsgi:app", "--bind", f"127.0.0.1:{sync_port}", "--workers", str(workers)],
+            cwd=ROOT, env=env),
+        "async": subprocess.Popen(
+            ["uvicorn", "async_api:app", "--host", "127.0.0.1", "--port", str(async_port),
+             "--workers", str(workers), "--no-access-log"],
+            cwd=ROOT, env=env),
+    }
+    try:
+        urls = {
+            "sync": wait_ready(servers["sync"], f"http://127.0.0.1:{sync_port}", "gunicorn"),
+            "async": wait_ready(servers["async"], f"http://127.0.0.1:{async_port}", "uvicorn"),
+        }
+    except Exception:
+        stop_servers(servers)
+        raise
+    return servers, urls
+
+
+def stop_servers(servers):
+    for proc in servers.values():
+        proc.terminate()
+    for proc in servers.values():
+        proc.wait(timeout=30)
+
+
+def customer_sessions(url, usernames, count):
+    """(session cookie, order ids) for `count` customers, logged in through the Flask app."""
+    customers = []
+    for username in usernames[:count]:
+        session, ok = http_load.login(url, username)
+        if not ok:
+            raise RuntimeError(f"could not log in as {username}")
+        orders = session.get(f"{url}/api/v1/orders", timeout=60).json()["orders"]
+        customers.append((session.cookies.get("session"), [o["_id"] for o in orders]))
+    return customers
+
+
+# ----------------- Traffic -----------------
+
+def _client_process(url, customers, product_ids, threads, duration, warmup, seed_value):
+    """Runs in a client process: `threads` closed-loop clients; returns per-endpoint latencies and errors."""
+    routes = list(TRAFFIC_MIX)
+    weights = [TRAFFIC_MIX[r] for r in routes]
+    latencies = {r: [] for r in routes}
+    errors = {r: 0 for r in routes}
+    lock = threading.Lock()
+    stop = threading.Event()
+    measuring = threading.Event()
+
+    def loop(i):
+        rnd = random.Random(seed_value + i)
+        cookie, order_ids = customers[i % len(customers)]
+        session = requests.Session()
+        session.cookies.set("session", cookie)
+        while not stop.is_set():
+            route = rnd.choices(routes, weights)[0]
+            if route == "products":
+                path = "/api/v1/products"
+            elif route == "product":
+                path = f"/api/v1/products/{rnd.choice(product_ids)}"
+            elif route == "my_orders":
+                path = "/api/v1/orders"
+            elif order_ids:
+                path = f"/api/v1/orders/{rnd.choice(order_ids)}"
+            else:
+                continue
+            started = time.perf_counter()
+            try:
+                ok = session.get(url + path, timeout=60).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if not measuring.is_set():
+                continue
+            with lock:
+                if ok:
+                    latencies[route].append(elapsed)
+                else:
+                    errors[route] += 1
+
+    workers = [threading.Thread(target=loop, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    time.sleep(warmup)
+    measuring.set()
+    time.sleep(duration)
+    stop.set()
+    for t in workers:
+        t.join()
+    return latencies, errors
+
+
+def run_level(url, customers, product_ids, concurrency, processes, duration, warmup, seed_value):
+    processes = max(1, min(processes, concurrency))
+    shares = [concurrency // processes + (1 if i < concurrency % processes else 0) for i in range(processes)]
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes) as pool:
+        parts = pool.starmap(_client_process, [
+            (url, customers[i::processes] or customers, product_ids, share, duration, warmup,
+             seed_value + i * 10000)
+            for i, share in enumerate(shares)])
+    # Every process measures the same `duration` window after its warm-up.
+    elapsed = duration
+
+    results = {}
+    for route in TRAFFIC_MIX:
+        values = [v for latencies, _ in parts for v in latencies[route]]
+        results[route] = {
+            "requests": len(values),
+            "errors": sum(errors[route] for _, errors in parts),
+            "throughput_rps": round(len(values) / elapsed, 2),
+        }
+        for pct in (50, 95, 99):
+            value = http_load.percentile(values, pct)
+            results[route][f"p{pct}_ms"] = round(value * 1000, 2) if value is not None else None
+    every = [v for latencies, _ in parts for route in TRAFFIC_MIX for v in latencies[route]]
+    totals = {
+        "requests": len(every),
+        "errors": sum(r["errors"] for r in results.values()),
+        "throughput_rps": round(len(every) / elapsed, 2),
+    }
+    for pct in (50, 95, 99):
+        value = http_load.percentile(every, pct)
+        totals[f"p{pct}_ms"] = round(value * 1000, 2) if value is not None else None
+    return results, totals
+
+
+def print_comparison(levels):
+    print(f"{'concurrency':>11} {'tier':6} {'rps':>9} {'err':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for level in levels:
+        for tier in ("sync", "async"):
+            t = level[tier]["totals"]
+            cells = [f"{t[k]:9.1f}" if t[k] is not None else f"{'n/a':>9}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+            print(f"{level['concurrency']:11d} {tier:6} {t['throughput_rps']:9.1f} {t['errors']:6d} {' '.join(cells)}")
+        sync_rps = level["sync"]["totals"]["throughput_rps"]
+        if sync_rps:
+            print(f"{'':11} async/sync throughput: {level['async']['totals']['throughput_rps'] / sync_rps:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mongo-host', default=os.environ.get('BENCH_MONGO_HOST', 'mongodb://127.0.0.1:27017'))
+    parser.add_argument('--db-name', default='dairy_api_tiers_bench')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes for each server.')
+    parser.add_argument('--worker-class', default='sync', choices=['sync', 'gthread', 'gevent'],
+                        help='gunicorn worker class for the sync tier (default sync).')
+    parser.add_argument('--sync-port', type=int, default=8056)
+    parser.add_argument('--async-port', type=int, default=8057)
+    parser.add_argument('--concurrency', default='32,128,512',
+                        help='Comma-separated numbers of concurrent clients to test.')
+    parser.add_argument('--client-processes', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--customers', type=int, default=200, help='Distinct logged-in customers.')
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('-o', '--output', help='Write results JSON here.')
+    parser.add_argument('--keep-data', action='store_true')
+    args = parser.parse_args()
+    concurrency_levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+
+    client = MongoClient(args.mongo_host)
+    client.drop_database(args.db_name)
+    db = client[args.db_name]
+    mongo_uri = f"{args.mongo_host.rstrip('/')}/{args.db_name}"
+
+    servers = None
+    try:
+        started = time.perf_counter()
+        usernames, product_ids = http_load.seed(db, args.users, args.products, args.orders, args.seed)
+        print(f"seeded {args.users} users, {args.products} products, {args.orders} orders "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        servers, urls = start_servers(mongo_uri, args.sync_port, args.async_port, args.workers,
+                                      args.worker_class)
+        customers = customer_sessions(urls["sync"], usernames, args.customers)
+
+        levels = []
+        for concurrency in concurrency_levels:
+            level = {"concurrency": concurrency}
+            for tier in ("sync", "async"):
+                routes, totals = run_level(urls[tier], customers, product_ids, concurrency,
+                                           args.client_processes, args.duration, args.warmup, args.seed)
+                level[tier] = {"totals": totals, "routes": routes}
+                print(f"c={concurrency} {tier}: {totals['throughput_rps']} rps, p95 {totals['p95_ms']}ms, "
+                      f"{totals['errors']} errors")
+            levels.append(level)
+        print_comparison(levels)
+
+        if args.output:
+            report = {
+                "meta": {
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "host": platform.node(),
+                    "commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                             capture_output=True, text=True).stdout.strip() or None,
+                    "dataset": {"users": args.users, "products": args.products, "orders": args.orders,
+                                "seed": args.seed},
+                    "workers": args.workers,
+                    "worker_class": args.worker_class,
+                    "client_processes": args.client_processes,
+                    "duration": args.duration,
+                },
+                "levels": levels,
+            }
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"results written to {args.output}")
+    finally:
+        if servers is not None:
+            stop_servers(servers)
+        if not args.keep_data:
+            client.drop_database(args.db_name)
+
+
+if __name__ == '__main__':
+    main()
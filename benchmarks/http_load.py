@@ -0,0 +1,356 @@
+"""
+HTTP load benchmark for the main routes.
+
+Seeds a sized, deterministic dataset into a scratch database on a local
+mongod, starts gunicorn on `wsgi:app` against it, drives a weighted mix of
+customer and admin traffic, and reports throughput and p50/p95/p99 latency
+per route. Results are written as JSON; pass a previous run as --baseline to
+fail (exit 1) when any route's p95 regresses beyond --max-regression:
+
+    python benchmarks/http_load.py --orders 50000 --duration 60 -o bench.json
+    python benchmarks/http_load.py --baseline bench.json -o candidate.json
+
+The scratch database is dropped afterwards unless --keep-data is given.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+from pymongo import MongoClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import indexes  # noqa: E402
+import passwords  # noqa: E402
+import sales_rollup  # noqa: E402
+import serializers  # noqa: E402
+
+PASSWORD = 'bench-password'
+ADMIN_USERNAME = 'bench-admin'
+SEED_BATCH = 5000
+
+# Relative weight of each route in the traffic mix.
+TRAFFIC_MIX = {
+    "login": 5,
+    "user_dashboard": 25,
+    "checkout": 10,
+    "user_orders": 20,
+    "admin_dashboard": 15,
+    "admin_orders": 15,
+    "admin_reports": 10,
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+# ----------------- Dataset -----------------
+
+def seed(db, users, products, orders, seed_value):
+    rnd = random.Random(seed_value)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    hashed = passwords.hash_password(PASSWORD)
+    version = serializers.SCHEMA_VERSION
+
+    user_docs = [{
+        "username": f"bench-user-{i}", "email": f"bench-user-{i}@example.com", "password": hashed,
+        "phone": f"9{i:09d}", "address": f"{i} Bench Street", "is_admin": False,
+        "created_at": now - timedelta(days=rnd.randint(0, 365)), "schema_version": version,
+    } for i in range(users)]
+    user_docs.append({
+        "username": ADMIN_USERNAME, "email": "bench-admin@example.com", "password": hashed,
+        "phone": "", "address": "", "is_admin": True, "created_at": now, "schema_version": version,
+    })
+    user_ids = db.users.insert_many(user_docs).inserted_ids[:users]
+
+    product_docs = [{
+        "name": f"Bench Product {i}", "description": f"Benchmark product {i}",
+        "price": float(rnd.randint(20, 500)), "stock": 10 ** 9, "unit": rnd.choice(["Liter", "Kg", "Piece"]),
+        "created_at": now, "schema_version": version,
+    } for i in range(products)]
+    db.products.insert_many(product_docs)  # fills in each doc's _id
+
+    for offset in range(0, orders, SEED_BATCH):
+        batch = []
+        for _ in range(min(SEED_BATCH, orders - offset)):
+            order_date = now - timedelta(minutes=rnd.randint(0, 90 * 24 * 60))
+            items = []
+            for prod in rnd.sample(product_docs, k=min(len(product_docs), rnd.randint(1, 4))):
+                quantity = rnd.randint(1, 5)
+                items.append({
+                    "product_id": prod["_id"], "product_name": prod["name"], "product_unit": prod["unit"],
+                    "quantity": quantity, "price": prod["price"], "subtotal": prod["price"] * quantity,
+                })
+            batch.append({
+                "user_id": rnd.choice(user_ids),
+                "total_amount": sum(it["subtotal"] for it in items),
+                "status": rnd.choices(["Completed", "Pending", "Cancelled"], weights=[80, 15, 5])[0],
+                "order_date": order_date,
+                "delivery_date": order_date + timedelta(days=1),
+                "updated_at": order_date,
+                "order_items": items,
+                "schema_version": version,
+            })
+        db.orders.insert_many(batch, ordered=False)
+
+    indexes.ensure_indexes(db)
+    sales_rollup.rebuild(db)
+    return [d["username"] for d in user_docs[:users]], [str(p["_id"]) for p in product_docs]
+
+
+# ----------------- Server -----------------
+
+def metrics_enabled():
+    """Whether the server will record Prometheus metrics (it does whenever prometheus_client is installed)."""
+    return importlib.util.find_spec("prometheus_client") is not None
+
+
+def start_server(mongo_uri, port, workers):
+    env = dict(os.environ, MONGO_URI=mongo_uri,
+               # Development config would switch the query profiler on; keep its
+               # capture and explain overhead out of the numbers.
+               QUERY_PROFILER='0',
+               PROMETHEUS_MULTIPROC_DIR=os.path.join(tempfile.gettempdir(), f"dairy-bench-prometheus-{port}"))
+    env.pop("ENV", None)  # development config: plain-HTTP session cookies
+    proc = subprocess.Popen(
+        ["gunicorn", "wsgi:app", "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--timeout", "60"],
+        cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            if requests.get(f"{url}/login", timeout=2).status_code == 200:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not become ready within 60s")
+
+
+def login(url, username):
+    session = requests.Session()
+    resp = session.post(f"{url}/login", data={"username": username, "password": PASSWORD},
+                        allow_redirects=False, timeout=60)
+    ok = resp.status_code == 302 and not resp.headers.get('Location', '').endswith('/login')
+    return session, ok
+
+
+# ----------------- Traffic -----------------
+
+class Client:
+    """One simulated browser holding a customer and an admin session."""
+
+    def __init__(self, url, username, product_ids, rnd):
+        self.url = url
+        self.username = username
+        self.product_ids = product_ids
+        self.rnd = rnd
+        self.customer, ok = login(url, username)
+        self.admin, admin_ok = login(url, ADMIN_USERNAME)
+        if not (ok and admin_ok):
+            raise RuntimeError(f"could not log in as {username} / {ADMIN_USERNAME}")
+
+    def request(self, route):
+        url = self.url
+        if route == "login":
+            return login(url, self.username)[1]
+        if route == "user_dashboard":
+            return self.customer.get(f"{url}/user/dashboard", timeout=60).status_code == 200
+        if route == "user_orders":
+            return self.customer.get(f"{url}/user/orders", timeout=60).status_code == 200
+        if route == "checkout":
+            items = [{"product_id": pid, "quantity": self.rnd.randint(1, 3)}
+                     for pid in self.rnd.sample(self.product_ids, k=min(2, len(self.product_ids)))]
+            resp = self.customer.post(f"{url}/user/place-order", json={"items": items}, timeout=60)
+            return resp.status_code == 200
+        if route == "admin_dashboard":
+            return self.admin.get(f"{url}/admin/dashboard", timeout=60).status_code == 200
+        if route == "admin_orders":
+            return self.admin.get(f"{url}/admin/orders", timeout=60).status_code == 200
+        if route == "admin_reports":
+            return self.admin.get(f"{url}/admin/reports", timeout=60).status_code == 200
+        raise KeyError(route)
+
+
+def run_traffic(url, usernames, product_ids, concurrency, duration, warmup, seed_value):
+    routes = list(TRAFFIC_MIX)
+    weights = [TRAFFIC_MIX[r] for r in routes]
+    latencies = {r: [] for r in routes}
+    errors = {r: 0 for r in routes}
+    lock = threading.Lock()
+    stop = threading.Event()
+    measuring = threading.Event()
+
+    clients = [Client(url, usernames[i % len(usernames)], product_ids, random.Random(seed_value + i))
+               for i in range(concurrency)]
+
+    def loop(client):
+        while not stop.is_set():
+            route = client.rnd.choices(routes, weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = client.request(route)
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if not measuring.is_set():
+                continue
+            with lock:
+                if ok:
+                    latencies[route].append(elapsed)
+                else:
+                    errors[route] += 1
+
+    threads = [threading.Thread(target=loop, args=(c,)) for c in clients]
+    for t in threads:
+        t.start()
+    time.sleep(warmup)
+    measuring.set()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for route in routes:
+        values = latencies[route]
+        results[route] = {
+            "requests": len(values),
+            "errors": errors[route],
+            "throughput_rps": round(len(values) / elapsed, 2),
+        }
+        for pct in (50, 95, 99):
+            value = percentile(values, pct)
+            results[route][f"p{pct}_ms"] = round(value * 1000, 2) if value is not None else None
+    total = sum(r["requests"] for r in results.values())
+    return results, {"requests": total, "throughput_rps": round(total / elapsed, 2), "seconds": round(elapsed, 2)}
+
+
+# ----------------- Baseline comparison -----------------
+
+def compare(results, baseline, max_regression):
+    """List of human-readable regressions against a previous run."""
+    problems = []
+    if baseline.get("meta", {}).get("metrics", metrics_enabled()) != metrics_enabled():
+        problems.append("baseline was recorded with metrics "
+                        f"{'on' if baseline['meta']['metrics'] else 'off'}; results are not comparable")
+    for route, base in baseline.get("routes", {}).items():
+        current = results.get(route)
+        if current is None:
+            continue
+        if base.get("p95_ms") and current.get("p95_ms") and \
+                current["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            problems.append(f"{route}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if current["errors"] and not base.get("errors"):
+            problems.append(f"{route}: {current['errors']} errors (baseline had none)")
+    return problems
+
+
+def print_table(results, totals):
+    print(f"{'route':16} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in results.items():
+        cells = [f"{r[k]:9.1f}" if r[k] is not None else f"{'n/a':>9}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{route:16} {r['requests']:7d} {r['errors']:5d} {r['throughput_rps']:8.1f} {' '.join(cells)}")
+    print(f"{'total':16} {totals['requests']:7d} {'':5} {totals['throughput_rps']:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mongo-host', default=os.environ.get('BENCH_MONGO_HOST', 'mongodb://127.0.0.1:27017'))
+    parser.add_argument('--db-name', default='dairy_http_bench')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--port', type=int, default=8055)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('-o', '--output', help='Write results JSON here.')
+    parser.add_argument('--baseline', help='Results JSON of a previous run to compare against.')
+    parser.add_argument('--max-regression', type=float, default=0.15,
+                        help='Allowed relative p95 increase per route (default 0.15).')
+    parser.add_argument('--keep-data', action='store_true')
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_host)
+    client.drop_database(args.db_name)
+    db = client[args.db_name]
+    mongo_uri = f"{args.mongo_host.rstrip('/')}/{args.db_name}"
+
+    server = None
+    try:
+        started = time.perf_counter()
+        usernames, product_ids = seed(db, args.users, args.products, args.orders, args.seed)
+        print(f"seeded {args.users} users, {args.products} products, {args.orders} orders "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        server, url = start_server(mongo_uri, args.port, args.workers)
+        results, totals = run_traffic(url, usernames, product_ids, args.concurrency,
+                                      args.duration, args.warmup, args.seed)
+        print_table(results, totals)
+
+        report = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "host": platform.node(),
+                "commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                         capture_output=True, text=True).stdout.strip() or None,
+                "dataset": {"users": args.users, "products": args.products, "orders": args.orders,
+                            "seed": args.seed},
+                "workers": args.workers,
+                "concurrency": args.concurrency,
+                "metrics": metrics_enabled(),
+                "duration": args.duration,
+            },
+            "totals": totals,
+            "routes": results,
+        }
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"results written to {args.output}")
+
+        if args.baseline:
+            with open(args.baseline) as f:
+                problems = compare(results, json.load(f), args.max_regression)
+            if problems:
+                print("REGRESSIONS:")
+                for line in problems:
+                    print(f"  {line}")
+                sys.exit(1)
+            print("no regressions against baseline")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if not args.keep_data:
+            client.drop_database(args.db_name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Login-storm benchmark.
+
+Drives concurrent logins against a running server while a few customers keep
+checking out, then reports login throughput and checkout latency
+percentiles. Compare runs with different PASSWORD_HASH_METHOD /
+PASSWORD_POOL_SIZE settings on the server:
+
+    gunicorn wsgi:app --workers 4 &
+    python benchmarks/login_storm.py --url http://127.0.0.1:8000 --duration 30
+
+Creates its own customers and product in the configured database and
+removes them afterwards.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_complete import db  # noqa: E402
+import passwords  # noqa: E402
+import sales_rollup  # noqa: E402
+
+PASSWORD = 'storm-password'
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def login(url, username):
+    session = requests.Session()
+    resp = session.post(f"{url}/login", data={"username": username, "password": PASSWORD},
+                        allow_redirects=False, timeout=60)
+    # Success redirects to a dashboard; bad credentials re-render the form and
+    # a saturated hashing pool redirects back to /login.
+    ok = resp.status_code == 302 and not resp.headers.get('Location', '').endswith('/login')
+    return session, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--login-threads', type=int, default=32)
+    parser.add_argument('--checkout-threads', type=int, default=4)
+    args = parser.parse_args()
+    url = args.url.rstrip('/')
+
+    tag = uuid.uuid4().hex[:8]
+    hashed = passwords.hash_password(PASSWORD)
+    now = datetime.now(timezone.utc)
+    users = [{
+        "username": f"storm-{tag}-{i}", "email": f"storm-{tag}-{i}@example.com", "password": hashed,
+        "phone": "", "address": "", "is_admin": False, "created_at": now
+    } for i in range(args.login_threads + args.checkout_threads)]
+    user_ids = db.users.insert_many(users).inserted_ids
+    product_id = db.products.insert_one({
+        "name": f"Storm Milk {tag}", "description": "", "price": 50.0, "stock": 10 ** 9,
+        "unit": "Liter", "created_at": now
+    }).inserted_id
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    logins = {"ok": 0, "failed": 0}
+    checkout_latencies = []
+    checkout_errors = [0]
+
+    def login_loop(username):
+        while not stop.is_set():
+            try:
+                _, ok = login(url, username)
+            except requests.RequestException:
+                ok = False
+            with lock:
+                logins["ok" if ok else "failed"] += 1
+
+    def checkout_loop(username):
+        session, _ = login(url, username)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                resp = session.post(f"{url}/user/place-order", timeout=60, json={
+                    "items": [{"product_id": str(product_id), "quantity": 1}]})
+                ok = resp.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    checkout_latencies.append(elapsed)
+                else:
+                    checkout_errors[0] += 1
+
+    threads = [threading.Thread(target=login_loop, args=(u["username"],)) for u in users[:args.login_threads]]
+    threads += [threading.Thread(target=checkout_loop, args=(u["username"],)) for u in users[args.login_threads:]]
+    try:
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        print(f"hash method: {passwords.HASH_METHOD} (client-side view; server settings may differ)")
+        print(f"logins: {logins['ok']} ok, {logins['failed']} failed, {logins['ok'] / elapsed:.1f}/s")
+        print(f"checkouts: {len(checkout_latencies)} ok, {checkout_errors[0]} failed")
+        for pct in (50, 95, 99):
+            value = percentile(checkout_latencies, pct)
+            print(f"checkout p{pct}: {value * 1000:.1f}ms" if value is not None else f"checkout p{pct}: n/a")
+    finally:
+        for o in db.orders.find({"user_id": {"$in": user_ids}}, {"order_date": 1, "total_amount": 1}):
+            db[sales_rollup.COLLECTION].update_one(
+                {"_id": sales_rollup.day_key(o['order_date'])},
+                {"$inc": {"orders": -1, "revenue": -o['total_amount']}})
+        db.orders.delete_many({"user_id": {"$in": user_ids}})
+        db.users.delete_many({"_id": {"$in": user_ids}})
+        db.products.delete_one({"_id": product_id})
+
+
+if __name__ == '__main__':
+    main()
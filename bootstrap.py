@@ -0,0 +1,183 @@
+"""
+One-time database bootstrap for the Dairy Management System.
+
+Seeds the default admin user and sample products exactly once per deployment.
+Concurrent gunicorn workers coordinate through an upsert-based lock document
+in `init_flags`, and each process remembers locally that bootstrap is done so
+steady-state requests never touch the database for it.
+
+Run it explicitly as a deploy step:
+
+    flask --app app_complete bootstrap
+"""
+
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+import catalog_cache
+import passwords
+import serializers
+
+BOOTSTRAP_ID = "bootstrap"
+LOCK_TTL = timedelta(seconds=60)
+RETRY_INTERVAL = 5  # seconds between request-time retries while another process holds the lock
+
+DEFAULT_ADMIN_EMAIL = 'admin@dairymanagement.com'
+
+SAMPLE_PRODUCTS = [
+    {"name": "Milk (1L)", "description": "Fresh whole milk", "price": 50.0, "stock": 100, "unit": "Liter"},
+    {"name": "Yogurt (500ml)", "description": "Creamy yogurt", "price": 80.0, "stock": 75, "unit": "ml"},
+    {"name": "Buttermilk (1L)", "description": "Fresh buttermilk", "price": 40.0, "stock": 50, "unit": "Liter"},
+    {"name": "Paneer (500g)", "description": "Fresh cottage cheese", "price": 250.0, "stock": 30, "unit": "grams"},
+    {"name": "Ghee (500ml)", "description": "Pure clarified butter", "price": 500.0, "stock": 20, "unit": "ml"},
+    {"name": "Cheese (200g)", "description": "Processed cheese", "price": 150.0, "stock": 40, "unit": "grams"},
+]
+
+# Process-local state: once set, requests skip bootstrap entirely.
+_initialized = False
+_next_attempt = 0.0
+
+
+def is_initialized():
+    return _initialized
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _already_initialized(db):
+    # Matches both the lock document and the legacy flag document written by
+    # the old per-request hook (which used an ObjectId _id).
+    return db.init_flags.find_one({"initialized": True}, {"_id": 1}) is not None
+
+
+def _acquire_lock(db, owner, now):
+    """Atomically take the bootstrap lock; returns None if someone else holds it."""
+    try:
+        return db.init_flags.find_one_and_update(
+            {
+                "_id": BOOTSTRAP_ID,
+                "initialized": {"$ne": True},
+                "$or": [{"locked_by": None}, {"lock_expires_at": {"$lt": now}}],
+            },
+            {
+                "$set": {"locked_by": owner, "lock_expires_at": now + LOCK_TTL},
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # The document exists but did not match: locked elsewhere or already done.
+        return None
+
+
+def _seed(db, now):
+    admin_user = {
+        "username": "admin",
+        "email": DEFAULT_ADMIN_EMAIL,
+        "password": passwords.hash_password("admin123"),
+        "phone": "9999999999",
+        "address": "Dairy Management HQ",
+        "is_admin": True,
+        "created_at": now,
+        "reset_token": None,
+        "reset_token_expiry": None,
+        "schema_version": serializers.SCHEMA_VERSION
+    }
+    result = db.users.update_one({"email": DEFAULT_ADMIN_EMAIL}, {"$setOnInsert": admin_user}, upsert=True)
+    admin_created = result.upserted_id is not None
+
+    products_inserted = 0
+    if admin_created:
+        products = [dict(p, created_at=now, schema_version=serializers.SCHEMA_VERSION) for p in SAMPLE_PRODUCTS]
+        db.products.insert_many(products)
+        products_inserted = len(products)
+        catalog_cache.bump_version(db)
+    return admin_created, products_inserted
+
+
+def run_bootstrap(db):
+    """
+    Bootstrap the database if no process has done so yet.
+    Returns a report dict describing what happened.
+    """
+    global _initialized, _next_attempt
+    started = time.perf_counter()
+    owner = _owner()
+    report = {"owner": owner, "status": None, "admin_created": False, "products_inserted": 0}
+
+    try:
+        if _already_initialized(db):
+            report["status"] = "already_initialized"
+        else:
+            now = datetime.now(timezone.utc)
+            if _acquire_lock(db, owner, now) is None:
+                report["status"] = "locked_elsewhere"
+            else:
+                admin_created, products_inserted = _seed(db, now)
+                report["admin_created"] = admin_created
+                report["products_inserted"] = products_inserted
+                db.init_flags.update_one({"_id": BOOTSTRAP_ID}, {"$set": {
+                    "initialized": True,
+                    "locked_by": None,
+                    "lock_expires_at": None,
+                    "initialized_by": owner,
+                    "updated_at": datetime.now(timezone.utc),
+                }})
+                report["status"] = "initialized"
+    except PyMongoError as e:
+        report["status"] = "error"
+        report["error"] = str(e)
+
+    if report["status"] in ("already_initialized", "initialized"):
+        _initialized = True
+    else:
+        _next_attempt = time.monotonic() + RETRY_INTERVAL
+
+    report["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return report
+
+
+def format_report(report):
+    line = (f"Bootstrap [{report['owner']}]: {report['status']} "
+            f"(admin_created={report['admin_created']}, products_inserted={report['products_inserted']}, "
+            f"{report['duration_ms']}ms)")
+    if report.get("error"):
+        line += f" error={report['error']}"
+    return line
+
+
+def startup(db):
+    """Run bootstrap once at process startup and print the report."""
+    report = run_bootstrap(db)
+    print(format_report(report))
+    return report
+
+
+def init_app(app, db):
+    """
+    Register the `flask bootstrap` command and a request hook that only
+    falls back to bootstrapping when this process has not done it yet.
+    """
+
+    @app.before_request
+    def ensure_bootstrapped():
+        if _initialized or time.monotonic() < _next_attempt:
+            return
+        startup(db)
+
+    @app.cli.command('bootstrap')
+    def bootstrap_command():
+        """Seed the default admin and sample products (idempotent)."""
+        report = run_bootstrap(db)
+        click.echo(format_report(report))
+        if report["status"] == "error":
+            raise SystemExit(1)
@@ -0,0 +1,121 @@
+"""
+In-process cache of the customer catalog (in-stock products).
+
+Each worker keeps the serialized product list together with the catalog
+version it was built from. The version lives in the `meta` collection and is
+bumped by every write that changes what customers see (product add/edit/
+delete, stock changes). Workers revalidate with a single `_id` lookup at most
+every CATALOG_REVALIDATE_SECONDS and rebuild only when the version moved, or
+unconditionally after CATALOG_MAX_AGE_SECONDS as a safety net for edits made
+outside the app.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import data_access
+
+META_ID = "catalog"
+REVALIDATE_SECONDS = float(os.environ.get('CATALOG_REVALIDATE_SECONDS', 2))
+MAX_AGE_SECONDS = float(os.environ.get('CATALOG_MAX_AGE_SECONDS', 300))
+
+_lock = threading.Lock()
+_products = None
+_version = None
+_tag = None
+_built_at = 0.0
+_checked_at = 0.0
+_stats = {"hits": 0, "misses": 0, "version_reads": 0, "rebuilds": 0,
+          "rebuild_seconds_total": 0.0, "last_rebuild_seconds": 0.0}
+
+
+def bump_version(db):
+    """Record a catalog change so every worker rebuilds on its next revalidation."""
+    db.meta.update_one({"_id": META_ID}, {"$inc": {"version": 1}}, upsert=True)
+    invalidate()
+
+
+def invalidate():
+    """Drop this worker's copy immediately."""
+    global _products
+    with _lock:
+        _products = None
+
+
+def _read_version(db):
+    doc = db.meta.find_one({"_id": META_ID}, {"version": 1})
+    return doc.get("version", 0) if doc else 0
+
+
+def _build(db):
+    products = []
+    for p in data_access.find_products(db, {"stock": {"$gt": 0}}, 'catalog-card'):
+        p['_id'] = str(p['_id'])
+        products.append(p)
+    return products
+
+
+def content_tag(version, products):
+    """
+    ETag material for a catalog snapshot: the version plus a hash of the
+    content, so a MAX_AGE rebuild that picks up an out-of-app edit (which
+    does not bump the version) still changes the tag.
+    """
+    body = json.dumps(products, sort_keys=True, separators=(',', ':'), default=str)
+    return f"{version}-{hashlib.sha1(body.encode()).hexdigest()[:16]}"
+
+
+def in_stock_products(db):
+    """
+    Serialized in-stock products for the customer dashboard.
+    The returned list is shared between requests and must not be mutated.
+    """
+    return snapshot(db)[1]
+
+
+def snapshot(db):
+    """(content tag, in-stock products) as currently cached by this worker; see content_tag."""
+    global _products, _version, _tag, _built_at, _checked_at
+    now = time.monotonic()
+    with _lock:
+        cached, cached_version, cached_tag = _products, _version, _tag
+        fresh = cached is not None and now - _built_at < MAX_AGE_SECONDS
+        if fresh and now - _checked_at < REVALIDATE_SECONDS:
+            _stats["hits"] += 1
+            return cached_tag, cached
+
+    if fresh:
+        version = _read_version(db)
+        with _lock:
+            _stats["version_reads"] += 1
+            if version == cached_version:
+                _checked_at = time.monotonic()
+                _stats["hits"] += 1
+                return cached_tag, cached
+    else:
+        version = _read_version(db)
+
+    started = time.perf_counter()
+    products = _build(db)
+    tag = content_tag(version, products)
+    elapsed = time.perf_counter() - started
+    with _lock:
+        _products, _version, _tag = products, version, tag
+        _built_at = _checked_at = time.monotonic()
+        _stats["misses"] += 1
+        _stats["rebuilds"] += 1
+        _stats["rebuild_seconds_total"] += elapsed
+        _stats["last_rebuild_seconds"] = elapsed
+    return tag, products
+
+
+def cache_info():
+    """Hit/miss/rebuild metrics for this worker process."""
+    with _lock:
+        info = dict(_stats, version=_version, cached_products=len(_products or []))
+    total = info["hits"] + info["misses"]
+    info["hit_rate"] = round(info["hits"] / total, 4) if total else 0.0
+    return info
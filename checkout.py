@@ -0,0 +1,146 @@
+"""
+Order placement with batched reads and atomic stock reservation.
+
+All cart products are loaded with one $in query, and stock is decremented
+with conditional `{stock: {$gte: qty}}` updates so two concurrent checkouts
+can never oversell. On replica sets (Atlas) the reservation, order insert and
+customer counter run in one multi-document transaction with a single
+bulk_write. On a standalone mongod, where transactions are unavailable, each
+line is reserved conditionally and already-reserved lines are put back in one
+bulk_write if a later line runs out.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+import data_access
+import serializers
+
+TRANSACTIONAL_TOPOLOGIES = ("ReplicaSetWithPrimary", "Sharded", "LoadBalanced")
+
+
+class CheckoutError(Exception):
+    """A cart problem that should be reported to the customer (HTTP 400)."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def _parse_cart(items):
+    """Return {product ObjectId: total quantity}, merging repeated lines."""
+    quantities = {}
+    for item in items:
+        try:
+            product_id = ObjectId(item['product_id'])
+        except Exception:
+            raise CheckoutError('Invalid product id')
+        try:
+            quantity = int(item['quantity'])
+        except (KeyError, TypeError, ValueError):
+            raise CheckoutError('Invalid quantity')
+        if quantity <= 0:
+            raise CheckoutError('Invalid quantity')
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def _build_order(db, user_id, quantities):
+    products = {
+        p['_id']: p for p in data_access.find_products(db, {"_id": {"$in": list(quantities)}}, 'pricing')
+    }
+
+    total_amount = 0.0
+    order_items = []
+    for product_id, quantity in quantities.items():
+        prod = products.get(product_id)
+        if not prod:
+            raise CheckoutError('Product not found')
+        # Early, optimistic check; the conditional update below is authoritative.
+        if prod.get('stock', 0) < quantity:
+            raise CheckoutError(f"Insufficient stock for {prod['name']}")
+
+        subtotal = float(prod['price']) * quantity
+        total_amount += subtotal
+        order_items.append({
+            "product_id": prod['_id'],            # stored as ObjectId
+            "product_name": prod['name'],
+            "product_unit": prod.get('unit', ''),
+            "quantity": quantity,
+            "price": float(prod['price']),
+            "subtotal": subtotal
+        })
+
+    now = datetime.now(timezone.utc)
+    return {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "total_amount": total_amount,
+        "status": "Pending",
+        "order_date": now,
+        "delivery_date": now + timedelta(days=1),
+        "updated_at": now,
+        "order_items": order_items,
+        "schema_version": serializers.SCHEMA_VERSION
+    }
+
+
+def _reserve_ops(order_items):
+    return [
+        UpdateOne({"_id": it['product_id'], "stock": {"$gte": it['quantity']}},
+                  {"$inc": {"stock": -it['quantity']}})
+        for it in order_items
+    ]
+
+
+def _write_in_transaction(client, db, order_doc):
+    def callback(session):
+        result = db.products.bulk_write(_reserve_ops(order_doc['order_items']), ordered=False, session=session)
+        if result.matched_count != len(order_doc['order_items']):
+            # Raising aborts the transaction, undoing any decrements.
+            raise CheckoutError('Insufficient stock for one or more items')
+        db.orders.insert_one(order_doc, session=session)
+        db.users.update_one({"_id": order_doc['user_id']}, {"$inc": {"total_orders": 1}}, session=session)
+
+    with client.start_session() as session:
+        session.with_transaction(callback)
+
+
+def _write_with_rollback(db, order_doc):
+    reserved = []
+    for it in order_doc['order_items']:
+        result = db.products.update_one(
+            {"_id": it['product_id'], "stock": {"$gte": it['quantity']}},
+            {"$inc": {"stock": -it['quantity']}},
+        )
+        if result.matched_count == 0:
+            if reserved:
+                db.products.bulk_write([
+                    UpdateOne({"_id": r['product_id']}, {"$inc": {"stock": r['quantity']}})
+                    for r in reserved
+                ], ordered=False)
+            raise CheckoutError(f"Insufficient stock for {it['product_name']}")
+        reserved.append(it)
+
+    db.orders.insert_one(order_doc)
+    db.users.update_one({"_id": order_doc['user_id']}, {"$inc": {"total_orders": 1}})
+
+
+def supports_transactions(client):
+    return client.topology_description.topology_type_name in TRANSACTIONAL_TOPOLOGIES
+
+
+def place_order(client, db, user_id, items):
+    """
+    Validate the cart, reserve stock and insert the order.
+    Returns the inserted order document; raises CheckoutError on cart problems.
+    """
+    quantities = _parse_cart(items)
+    order_doc = _build_order(db, user_id, quantities)
+    if supports_transactions(client):
+        _write_in_transaction(client, db, order_doc)
+    else:
+        _write_with_rollback(db, order_doc)
+    return order_doc
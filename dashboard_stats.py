@@ -0,0 +1,95 @@
+"""
+Cached admin dashboard statistics.
+
+The dashboard snapshot (totals plus the ten most recent orders) is cached per
+worker process for a short TTL. Writes that change the numbers call
+`invalidate()` so the admin who made the change sees it immediately; other
+workers pick it up when their TTL expires.
+"""
+
+import os
+import threading
+import time
+
+import data_access
+import sales_rollup
+import serializers
+
+CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', 30))
+RECENT_ORDERS = 10
+
+_lock = threading.Lock()
+_snapshot = None
+_expires_at = 0.0
+_generation = 0
+_hits = 0
+_misses = 0
+
+
+def invalidate():
+    global _snapshot, _generation
+    with _lock:
+        _snapshot = None
+        _generation += 1
+
+
+def cache_info():
+    """Hit/miss counters for this worker process."""
+    with _lock:
+        total = _hits + _misses
+        return {
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / total, 4) if total else 0.0,
+            "ttl": CACHE_TTL,
+        }
+
+
+def _recent_orders(db):
+    orders = list(db.orders.find({}, {
+        "user_id": 1, "total_amount": 1, "status": 1, "order_date": 1
+    }).sort("order_date", -1).limit(RECENT_ORDERS))
+
+    # One $in lookup for all customers on the page instead of one find_one each.
+    user_ids = list({o['user_id'] for o in orders if o.get('user_id')})
+    users = {}
+    if user_ids:
+        for u in data_access.find_users(db, {"_id": {"$in": user_ids}}, 'auth'):
+            users[u['_id']] = {"username": u.get('username', 'Unknown')}
+
+    for o in orders:
+        o['user'] = users.get(o.get('user_id'))
+        serializers.order(o)
+    return orders
+
+
+def _build(db):
+    totals = sales_rollup.totals(db)
+    return {
+        # Exact counts are not needed on an overview page.
+        "total_products": db.products.estimated_document_count(),
+        "total_orders": db.orders.estimated_document_count(),
+        # Admins are few and indexed (see indexes.py); customers are everyone else.
+        "total_users": db.users.estimated_document_count() - db.users.count_documents({"is_admin": True}),
+        "total_revenue": totals["revenue"],
+        "recent_orders": _recent_orders(db),
+    }
+
+
+def get_snapshot(db):
+    global _snapshot, _expires_at, _hits, _misses
+    now = time.monotonic()
+    with _lock:
+        if _snapshot is not None and now < _expires_at:
+            _hits += 1
+            return _snapshot
+        _misses += 1
+        generation = _generation
+
+    snapshot = _build(db)
+    with _lock:
+        # Don't cache a snapshot that an invalidate() raced with.
+        if generation == _generation:
+            _snapshot = snapshot
+            _expires_at = time.monotonic() + CACHE_TTL
+    return snapshot
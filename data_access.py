@@ -0,0 +1,63 @@
+"""
+Data-access helpers with named field projections.
+
+Routes ask for a named view of a user or product instead of the whole
+document, which keeps password hashes and reset tokens out of templates and
+cuts the bytes transferred and decoded on every request.
+"""
+
+from bson.objectid import ObjectId
+
+USER_PROJECTIONS = {
+    # Authorization checks and redirects
+    "auth": {"username": 1, "is_admin": 1},
+    # Credential verification at login
+    "login": {"username": 1, "is_admin": 1, "password": 1},
+    # Password change
+    "password": {"password": 1},
+    # Password reset link validation
+    "reset": {"reset_token_expiry": 1},
+    # Admin user listing
+    "display": {"username": 1, "email": 1, "phone": 1, "address": 1, "created_at": 1},
+    # Customer shown next to an order
+    "contact": {"_id": 0, "username": 1, "email": 1, "phone": 1},
+    # Existence checks
+    "id": {"_id": 1},
+}
+
+PRODUCT_PROJECTIONS = {
+    # Customer catalog, admin product list and edit form
+    "catalog-card": {"sku": 1, "name": 1, "description": 1, "price": 1, "stock": 1, "unit": 1},
+    # Checkout pricing and stock check
+    "pricing": {"name": 1, "price": 1, "unit": 1, "stock": 1},
+    # Stock report
+    "inventory": {"name": 1, "stock": 1, "unit": 1},
+}
+
+
+def get_user(db, user_id, view):
+    """Fetch a user by id (ObjectId or string); None if missing or invalid."""
+    try:
+        return db.users.find_one({"_id": ObjectId(user_id)}, USER_PROJECTIONS[view])
+    except Exception:
+        return None
+
+
+def find_user(db, query, view):
+    return db.users.find_one(query, USER_PROJECTIONS[view])
+
+
+def find_users(db, query, view):
+    return db.users.find(query, USER_PROJECTIONS[view])
+
+
+def user_exists(db, query):
+    return db.users.find_one(query, USER_PROJECTIONS["id"]) is not None
+
+
+def find_product(db, query, view):
+    return db.products.find_one(query, PRODUCT_PROJECTIONS[view])
+
+
+def find_products(db, query, view):
+    return db.products.find(query, PRODUCT_PROJECTIONS[view])
@@ -0,0 +1,193 @@
+"""
+Mongo-backed email outbox.
+
+Requests only enqueue messages into `email_outbox`; a separate worker process
+drains the queue in batches over one reused SMTP connection, retrying
+failures with exponential backoff and dead-lettering messages that keep
+failing. Run the worker with:
+
+    flask --app app_complete email-worker
+
+For local testing point MAIL_SERVER/MAIL_PORT at a debugging SMTP server,
+e.g. `python -m aiosmtpd -n -l localhost:1025` with MAIL_PORT=1025 and
+MAIL_USE_TLS=0, and check queue depth and latency with
+`flask email-outbox-stats`.
+"""
+
+import os
+import smtplib
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask_mail import Message
+
+COLLECTION = "email_outbox"
+BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6))
+BACKOFF_BASE_SECONDS = float(os.environ.get('EMAIL_BACKOFF_BASE_SECONDS', 30))
+BACKOFF_MAX_SECONDS = float(os.environ.get('EMAIL_BACKOFF_MAX_SECONDS', 3600))
+POLL_SECONDS = float(os.environ.get('EMAIL_WORKER_POLL_SECONDS', 2))
+# A claim older than this is assumed to belong to a crashed worker.
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+# Errors after which the SMTP connection can't be reused.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, OSError)
+
+
+def _as_utc(dt):
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def enqueue(db, recipient, subject, html):
+    """Queue a message for the worker. Returns the outbox document id."""
+    now = datetime.now(timezone.utc)
+    return db[COLLECTION].insert_one({
+        "to": recipient,
+        "subject": subject,
+        "html": html,
+        "status": "pending",
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+    }).inserted_id
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+
+
+def claim_batch(db, batch_size=BATCH_SIZE):
+    """Atomically claim up to batch_size due messages for this worker."""
+    now = datetime.now(timezone.utc)
+    due = {"$or": [
+        {"status": "pending", "next_attempt_at": {"$lte": now}},
+        {"status": "sending", "claimed_at": {"$lt": now - CLAIM_TIMEOUT}},
+    ]}
+    ids = [d["_id"] for d in db[COLLECTION].find(due, {"_id": 1}).sort("next_attempt_at", 1).limit(batch_size)]
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    db[COLLECTION].update_many(
+        {"$and": [{"_id": {"$in": ids}}, due]},
+        {"$set": {"status": "sending", "claim_token": token, "claimed_at": now,
+                  "claimed_by": f"{socket.gethostname()}:{os.getpid()}"}},
+    )
+    # Another worker may have claimed some of them in between.
+    return list(db[COLLECTION].find({"_id": {"$in": ids}, "claim_token": token}))
+
+
+def _mark_sent(db, doc):
+    now = datetime.now(timezone.utc)
+    created_at = _as_utc(doc["created_at"])
+    db[COLLECTION].update_one({"_id": doc["_id"]}, {
+        "$set": {"status": "sent", "sent_at": now,
+                 "send_latency_ms": round((now - created_at).total_seconds() * 1000, 1)},
+        "$inc": {"attempts": 1},
+        "$unset": {"claim_token": "", "last_error": ""},
+    })
+
+
+def _mark_failed(db, doc, error):
+    attempts = doc.get("attempts", 0) + 1
+    update = {"attempts": attempts, "last_error": str(error)[:500]}
+    if attempts >= MAX_ATTEMPTS:
+        update["status"] = "dead"
+    else:
+        update["status"] = "pending"
+        update["next_attempt_at"] = datetime.now(timezone.utc) + timedelta(seconds=backoff(attempts))
+    db[COLLECTION].update_one({"_id": doc["_id"]}, {"$set": update, "$unset": {"claim_token": ""}})
+
+
+def _release(db, docs):
+    """Hand unsent claimed messages back without counting an attempt."""
+    if docs:
+        db[COLLECTION].update_many(
+            {"_id": {"$in": [d["_id"] for d in docs]}},
+            {"$set": {"status": "pending"}, "$unset": {"claim_token": ""}},
+        )
+
+
+def send_batch(db, mail, batch):
+    """Send a claimed batch over one SMTP connection. Returns (sent, failed)."""
+    sent = failed = 0
+    remaining = list(batch)
+    try:
+        with mail.connect() as conn:
+            while remaining:
+                doc = remaining.pop(0)
+                try:
+                    conn.send(Message(subject=doc["subject"], recipients=[doc["to"]], html=doc["html"]))
+                except CONNECTION_ERRORS as e:
+                    _mark_failed(db, doc, e)
+                    failed += 1
+                    # The connection is gone; retry the rest in the next batch.
+                    _release(db, remaining)
+                    remaining = []
+                except smtplib.SMTPException as e:
+                    _mark_failed(db, doc, e)
+                    failed += 1
+                else:
+                    _mark_sent(db, doc)
+                    sent += 1
+    except CONNECTION_ERRORS + (smtplib.SMTPException,) as e:
+        # Could not connect or log in: every unsent message counts a failed attempt.
+        for doc in remaining:
+            _mark_failed(db, doc, e)
+            failed += 1
+    return sent, failed
+
+
+def run_worker(db, mail, once=False, batch_size=BATCH_SIZE):
+    """Drain the outbox until interrupted (or once, for cron/tests)."""
+    while True:
+        batch = claim_batch(db, batch_size)
+        if batch:
+            started = time.perf_counter()
+            sent, failed = send_batch(db, mail, batch)
+            click.echo(f"email-worker: sent={sent} failed={failed} "
+                       f"batch_ms={round((time.perf_counter() - started) * 1000, 1)}")
+        if once and not batch:
+            return
+        if not batch:
+            time.sleep(POLL_SECONDS)
+
+
+def queue_stats(db):
+    """Queue depth per status, age of the oldest due message and recent send latency."""
+    stats = {"counts": {}, "oldest_pending_seconds": None, "avg_send_latency_ms": None}
+    for row in db[COLLECTION].aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+        stats["counts"][row["_id"]] = row["count"]
+
+    oldest = db[COLLECTION].find_one({"status": "pending"}, {"created_at": 1}, sort=[("next_attempt_at", 1)])
+    if oldest:
+        age = datetime.now(timezone.utc) - _as_utc(oldest["created_at"])
+        stats["oldest_pending_seconds"] = round(age.total_seconds(), 1)
+
+    # Only sent messages carry sent_at, so this walks the TTL index.
+    recent = [d["send_latency_ms"] for d in db[COLLECTION].find(
+        {"sent_at": {"$exists": True}}, {"send_latency_ms": 1}).sort("sent_at", -1).limit(100)
+        if "send_latency_ms" in d]
+    if recent:
+        stats["avg_send_latency_ms"] = round(sum(recent) / len(recent), 1)
+    return stats
+
+
+def init_app(app, db, mail):
+    @app.cli.command('email-worker')
+    @click.option('--once', is_flag=True, help='Drain the queue and exit.')
+    @click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+    def email_worker_command(once, batch_size):
+        """Send queued emails over a reused SMTP connection."""
+        run_worker(db, mail, once=once, batch_size=batch_size)
+
+    @app.cli.command('email-outbox-stats')
+    def email_outbox_stats_command():
+        """Show outbox depth and send latency."""
+        stats = queue_stats(db)
+        for status, count in sorted(stats["counts"].items()):
+            click.echo(f"{status}: {count}")
+        click.echo(f"oldest pending: {stats['oldest_pending_seconds']}s")
+        click.echo(f"avg send latency (last 100): {stats['avg_send_latency_ms']}ms")
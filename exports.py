@@ -0,0 +1,164 @@
+"""
+Streaming data exports (CSV or NDJSON).
+
+Each dataset is produced row by row from a batched, projected Mongo cursor
+and encoded line by line, so memory stays flat however many orders are
+exported. Served by `/admin/export/<dataset>.<fmt>` and by the CLI:
+
+    flask --app app_complete export orders --format csv --from 2025-01-01 -o orders.csv
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import click
+
+import data_access
+import sales_rollup
+
+BATCH_SIZE = 1000
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _date_filter(field, date_from, date_to):
+    if not (date_from or date_to):
+        return {}
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = date_from
+    if date_to:
+        bounds["$lt"] = date_to + timedelta(days=1)
+    return {field: bounds}
+
+
+def order_rows(db, date_from=None, date_to=None):
+    cursor = db.orders.find(
+        _date_filter("order_date", date_from, date_to),
+        {"user_id": 1, "order_date": 1, "delivery_date": 1, "status": 1, "total_amount": 1,
+         "item_count": {"$size": {"$ifNull": ["$order_items", []]}}},
+    ).sort("order_date", 1).batch_size(BATCH_SIZE)
+    for o in cursor:
+        yield {
+            "order_id": str(o["_id"]),
+            "user_id": str(o.get("user_id", "")),
+            "order_date": _iso(o.get("order_date")),
+            "delivery_date": _iso(o.get("delivery_date")),
+            "status": o.get("status"),
+            "total_amount": o.get("total_amount"),
+            "item_count": o.get("item_count", 0),
+        }
+
+
+def order_item_rows(db, date_from=None, date_to=None):
+    cursor = db.orders.find(
+        _date_filter("order_date", date_from, date_to),
+        {"order_date": 1, "status": 1, "order_items": 1},
+    ).sort("order_date", 1).batch_size(BATCH_SIZE)
+    for o in cursor:
+        for it in o.get("order_items") or []:
+            yield {
+                "order_id": str(o["_id"]),
+                "order_date": _iso(o.get("order_date")),
+                "status": o.get("status"),
+                "product_id": str(it.get("product_id", "")),
+                "product_name": it.get("product_name"),
+                "product_unit": it.get("product_unit"),
+                "quantity": it.get("quantity"),
+                "price": it.get("price"),
+                "subtotal": it.get("subtotal"),
+            }
+
+
+def daily_sales_rows(db, date_from=None, date_to=None):
+    query = {}
+    if date_from or date_to:
+        query["_id"] = {}
+        if date_from:
+            query["_id"]["$gte"] = sales_rollup.day_key(date_from)
+        if date_to:
+            query["_id"]["$lte"] = sales_rollup.day_key(date_to)
+    for row in db[sales_rollup.COLLECTION].find(query).sort("_id", 1).batch_size(BATCH_SIZE):
+        yield {
+            "date": row["_id"],
+            "orders": row.get("orders", 0),
+            "revenue": row.get("revenue", 0.0),
+            "cancelled_orders": row.get("cancelled_orders", 0),
+        }
+
+
+def product_rows(db, date_from=None, date_to=None):
+    for p in data_access.find_products(db, {}, 'catalog-card').batch_size(BATCH_SIZE):
+        yield {
+            "product_id": str(p["_id"]),
+            "name": p.get("name"),
+            "description": p.get("description"),
+            "price": p.get("price"),
+            "stock": p.get("stock"),
+            "unit": p.get("unit"),
+        }
+
+
+DATASETS = {
+    "orders": (order_rows, ["order_id", "user_id", "order_date", "delivery_date", "status",
+                            "total_amount", "item_count"]),
+    "order-items": (order_item_rows, ["order_id", "order_date", "status", "product_id", "product_name",
+                                      "product_unit", "quantity", "price", "subtotal"]),
+    "daily-sales": (daily_sales_rows, ["date", "orders", "revenue", "cancelled_orders"]),
+    "products": (product_rows, ["product_id", "name", "description", "price", "stock", "unit"]),
+}
+
+
+def _csv_lines(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def stream(db, dataset, fmt, date_from=None, date_to=None):
+    """Generator of encoded text chunks for a dataset; raises KeyError if unknown."""
+    row_fn, columns = DATASETS[dataset]
+    if fmt not in FORMATS:
+        raise KeyError(fmt)
+    rows = row_fn(db, date_from, date_to)
+    return _csv_lines(rows, columns) if fmt == "csv" else _ndjson_lines(rows)
+
+
+def _parse_date(ctx, param, value):
+    """click callback: YYYY-MM-DD as a UTC datetime (None when not given)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise click.BadParameter(f"expected YYYY-MM-DD, got {value!r}")
+
+
+def init_app(app, db):
+    @app.cli.command('export')
+    @click.argument('dataset', type=click.Choice(sorted(DATASETS)))
+    @click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+    @click.option('--from', 'date_from', callback=_parse_date, help='First day (YYYY-MM-DD), inclusive.')
+    @click.option('--to', 'date_to', callback=_parse_date, help='Last day (YYYY-MM-DD), inclusive.')
+    @click.option('-o', '--output', type=click.File('w', encoding='utf-8'), default='-')
+    def export_command(dataset, fmt, date_from, date_to, output):
+        """Stream a dataset to a file or stdout."""
+        for chunk in stream(db, dataset, fmt, date_from, date_to):
+            output.write(chunk)
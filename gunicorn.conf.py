@@ -0,0 +1,82 @@
+"""
+Gunicorn settings, loaded automatically from the working directory, so the
+whole runtime is just `gunicorn wsgi:app`.
+
+The app is preloaded in the master: wsgi.py creates indexes and bootstraps
+the database once, then the master closes its MongoDB client before forking
+and every worker opens its own (see mongo.py). Workers are recycled after
+GUNICORN_MAX_REQUESTS requests (with jitter so they don't all restart at once).
+
+GUNICORN_WORKER_CLASS picks the concurrency model, and the per-process Mongo
+pool is sized to match unless MONGO_MAX_POOL_SIZE is set explicitly:
+
+    sync      one request at a time per worker       -> pool of 3 (1 + 2)
+    gthread   GUNICORN_THREADS requests per worker   -> pool of threads + 2 (default)
+    gevent    GUNICORN_WORKER_CONNECTIONS greenlets  -> pool of MONGO_GEVENT_POOL_SIZE (default 50);
+              needs the optional `gevent` package (commented out in requirements.txt)
+
+Workers share a Prometheus samples directory so /metrics reports the whole
+server rather than whichever worker answered the scrape.
+"""
+
+import os
+import tempfile
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    # Patch before the app (and pymongo) are imported by preload_app.
+    try:
+        from gevent import monkey
+    except ImportError:
+        raise RuntimeError("GUNICORN_WORKER_CLASS=gevent needs the optional gevent package: "
+                           "pip install gevent==24.11.1")
+    monkey.patch_all()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+threads = int(os.environ.get("GUNICORN_THREADS", 4)) if worker_class == "gthread" else 1
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 100))
+
+preload_app = True
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Every request in flight may hold one connection; a couple spare cover the
+# background monitor and short bursts without queueing on waitQueueTimeoutMS.
+if worker_class == "gevent":
+    _pool_size = int(os.environ.get("MONGO_GEVENT_POOL_SIZE", 50))
+else:
+    _pool_size = threads + 2
+os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(_pool_size))
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "dairy-prometheus"))
+
+
+def on_starting(server):
+    import metrics
+    metrics.prepare_multiprocess_dir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+
+def when_ready(server):
+    # Startup work in wsgi.py ran on the master's client; don't carry it into the workers.
+    from app_complete import mongo_client
+    mongo_client.close()
+    server.log.info("MongoDB pool: maxPoolSize=%s per worker, %s workers (%s)",
+                    os.environ["MONGO_MAX_POOL_SIZE"], workers, worker_class)
+
+
+def post_fork(server, worker):
+    # Start server discovery now so the first request doesn't pay for it.
+    from app_complete import mongo_client
+    try:
+        mongo_client.get()
+    except Exception as e:
+        worker.log.warning("MongoDB client creation failed in worker %s: %s", worker.pid, e)
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_worker_dead(worker.pid)
@@ -0,0 +1,162 @@
+"""
+Prometheus metrics.
+
+Records, per Flask endpoint, request counts by status, latency histograms and
+the number of MongoDB commands each request issued, plus per-collection /
+per-command counts and latencies from a PyMongo CommandListener. Everything
+is served in Prometheus text format at /metrics.
+
+Under gunicorn each worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(set up by gunicorn.conf.py) and /metrics merges all workers, so a scrape
+sees the whole server whichever worker answers it.
+
+/metrics requires `Authorization: Bearer $METRICS_TOKEN`; without a token
+configured it only answers requests from localhost.
+
+Needs the optional `prometheus_client` package; without it the app runs
+uninstrumented and /metrics is not registered.
+"""
+
+import hmac
+import os
+import shutil
+import threading
+import time
+
+from flask import Response, abort, g, has_request_context, request
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                                   Histogram, generate_latest, multiprocess)
+    from pymongo import monitoring
+except ImportError:  # optional: metrics are disabled
+    monitoring = None
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+LOCAL_ADDRS = ('127.0.0.1', '::1')
+
+# Commands that are driver housekeeping rather than application queries.
+IGNORED_COMMANDS = {'hello', 'ismaster', 'isMaster', 'ping', 'endSessions', 'saslStart', 'saslContinue',
+                    'buildInfo', 'getnonce', 'authenticate'}
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+COMMANDS_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+if monitoring is not None:
+    HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests', ['endpoint', 'method', 'status'])
+    HTTP_LATENCY = Histogram('http_request_duration_seconds', 'HTTP request latency',
+                             ['endpoint', 'method'], buckets=REQUEST_BUCKETS)
+    HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests being served',
+                           multiprocess_mode='livesum')
+    MONGO_COMMANDS = Counter('mongo_commands_total', 'MongoDB commands', ['collection', 'command', 'outcome'])
+    MONGO_LATENCY = Histogram('mongo_command_duration_seconds', 'MongoDB command latency',
+                              ['collection', 'command'], buckets=MONGO_BUCKETS)
+    MONGO_PER_REQUEST = Histogram('mongo_commands_per_request', 'MongoDB commands issued per HTTP request',
+                                  ['endpoint'], buckets=COMMANDS_PER_REQUEST_BUCKETS)
+
+    class CommandMetrics(monitoring.CommandListener):
+        """Times every application command and counts it against the current request."""
+
+        def __init__(self):
+            self._lock = threading.Lock()
+            self._pending = {}
+
+        def started(self, event):
+            if event.command_name in IGNORED_COMMANDS:
+                return
+            collection = event.command.get(event.command_name)
+            if event.command_name == 'getMore':
+                collection = event.command.get('collection')
+            with self._lock:
+                self._pending[(event.connection_id, event.request_id)] = (
+                    collection if isinstance(collection, str) else event.database_name)
+            if has_request_context():
+                g.mongo_commands = g.get('mongo_commands', 0) + 1
+
+        def _finish(self, event, outcome):
+            with self._lock:
+                collection = self._pending.pop((event.connection_id, event.request_id), None)
+            if collection is None:
+                return
+            MONGO_COMMANDS.labels(collection, event.command_name, outcome).inc()
+            MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+        def succeeded(self, event):
+            self._finish(event, 'ok')
+
+        def failed(self, event):
+            self._finish(event, 'error')
+
+
+def enabled():
+    return monitoring is not None
+
+
+def mongo_listeners():
+    """Event listeners to pass to the MongoClient (empty when metrics are disabled)."""
+    return [CommandMetrics()] if enabled() else []
+
+
+def prepare_multiprocess_dir(path):
+    """Start a server with an empty samples directory (call once, in the gunicorn master)."""
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def mark_worker_dead(pid):
+    """Drop a dead worker's live gauges (gunicorn child_exit hook)."""
+    if enabled() and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+def _authorized():
+    if METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '')
+        return hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}")
+    return request.remote_addr in LOCAL_ADDRS
+
+
+def render():
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+def init_app(app):
+    if not enabled():
+        app.logger.info("prometheus_client is not installed; /metrics disabled")
+        return
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+        g.mongo_commands = 0
+        g.metrics_in_flight = True
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None or request.endpoint == 'metrics':
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        HTTP_REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+        MONGO_PER_REQUEST.labels(endpoint).observe(g.get('mongo_commands', 0))
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        if g.pop('metrics_in_flight', False):
+            HTTP_IN_FLIGHT.dec()
+
+    @app.route('/metrics')
+    def metrics():
+        if not _authorized():
+            abort(403)
+        return Response(render(), content_type=CONTENT_TYPE_LATEST, headers={"Cache-Control": "no-store"})
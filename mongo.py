@@ -0,0 +1,107 @@
+"""
+Fork-safe, process-local MongoDB client.
+
+A MongoClient must not cross a fork: its monitor threads and pooled sockets
+belong to the process that created it. Gunicorn preloads the app in the
+master and then forks workers, so modules hold a `LazyDatabase` proxy
+instead of a real Database. Each process builds its own client on first use
+(or eagerly in gunicorn's post_fork hook); a client inherited through fork
+is dropped, never used.
+
+Pool size and timeouts come from the environment:
+
+    MONGO_MAX_POOL_SIZE                 connections per process (default 10;
+                                        gunicorn.conf.py sizes it to the worker class)
+    MONGO_MIN_POOL_SIZE                 connections kept warm (default 0)
+    MONGO_MAX_CONNECTING                concurrent connection handshakes (default 2)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS         how long a request waits for a free connection (default 5000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS   (default 5000)
+    MONGO_CONNECT_TIMEOUT_MS            (default 5000)
+    MONGO_SOCKET_TIMEOUT_MS             (default 30000, below the gunicorn timeout)
+"""
+
+import os
+import threading
+
+from pymongo import MongoClient
+from pymongo.uri_parser import parse_uri
+
+ENV_OPTIONS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", 10),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", 0),
+    "maxConnecting": ("MONGO_MAX_CONNECTING", 2),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", 5000),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", 30000),
+}
+
+
+def client_options():
+    """MongoClient keyword arguments read from the environment at call time."""
+    return {option: int(os.environ.get(var, default)) for option, (var, default) in ENV_OPTIONS.items()}
+
+
+class ProcessLocalClient:
+    """Creates the MongoClient lazily, once per process."""
+
+    def __init__(self, uri, **options):
+        self.uri = uri
+        self.database_name = parse_uri(uri)["database"]
+        if not self.database_name:
+            raise ValueError("MONGO_URI must name a database, e.g. mongodb://host:27017/dairy_management_db")
+        self.options = options
+        self._client = None
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._forget)
+
+    def _forget(self):
+        # The child must not touch the parent's sockets or threads; just drop the reference.
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = MongoClient(self.uri, **dict(client_options(), **self.options))
+                client = self._client
+        return client
+
+    def close(self):
+        """Close this process's client (e.g. in the gunicorn master before forking)."""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def database(self):
+        return LazyDatabase(self)
+
+
+class LazyDatabase:
+    """Stands in for pymongo's Database, resolving to the current process's client on every access."""
+
+    def __init__(self, holder):
+        self._holder = holder
+        self.name = holder.database_name
+
+    @property
+    def client(self):
+        return self._holder.get()
+
+    def _db(self):
+        return self._holder.get()[self.name]
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self._db(), attr)
+
+    def __getitem__(self, collection):
+        return self._db()[collection]
+
+    def __repr__(self):
+        return f"LazyDatabase({self.name!r})"
@@ -0,0 +1,114 @@
+"""
+Order status changes, one order or many at a time.
+
+Every change goes through `change_status`, which checks the transition,
+flips all eligible orders with a single update_many, and then settles the
+side effects in batches: one $inc per product to restock cancelled orders
+and one $inc per day on the sales rollup.
+
+Allowed transitions:
+
+    Pending   -> Completed, Cancelled
+    Completed -> Pending      (undo a delivery marked by mistake)
+    Cancelled is final: its stock has already been returned.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+import catalog_cache
+import dashboard_stats
+import sales_rollup
+
+TRANSITIONS = {
+    "Pending": ("Completed", "Cancelled"),
+    "Completed": ("Pending",),
+    "Cancelled": (),
+}
+MAX_BATCH = 1000
+
+
+def allowed_sources(new_status):
+    return [old for old, targets in TRANSITIONS.items() if new_status in targets]
+
+
+def _restock(db, orders):
+    """Return the stock of cancelled orders: one $inc per product, whatever the line count."""
+    per_product = {}
+    for order in orders:
+        for it in order.get('order_items') or []:
+            if it.get('product_id') is not None:
+                per_product[it['product_id']] = per_product.get(it['product_id'], 0) + int(it.get('quantity', 0))
+    ops = [UpdateOne({"_id": pid}, {"$inc": {"stock": qty}}) for pid, qty in per_product.items() if qty]
+    if ops:
+        db.products.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def change_status(db, order_ids, new_status):
+    """
+    Move the given orders to `new_status`. Orders that are missing or whose
+    current status does not allow the transition are left alone and reported.
+    Raises ValueError for more than MAX_BATCH orders rather than dropping any.
+    Returns {"updated": n, "restocked_products": n, "skipped": [(order_id, reason)]}.
+    """
+    if new_status not in TRANSITIONS:
+        raise ValueError(f"unknown status {new_status!r}")
+    requested = list(dict.fromkeys(order_ids))
+    if len(requested) > MAX_BATCH:
+        raise ValueError(f"at most {MAX_BATCH} orders can be changed at once ({len(requested)} given)")
+    result = {"updated": 0, "restocked_products": 0, "skipped": []}
+    ids = []
+    for raw in requested:
+        try:
+            ids.append(ObjectId(raw))
+        except Exception:
+            result["skipped"].append((str(raw), "invalid id"))
+    if not ids:
+        return result
+
+    # The batch token tells us exactly which orders this call moved, even if
+    # another admin changes some of them concurrently.
+    batch = ObjectId()
+    sources = allowed_sources(new_status)
+    db.orders.update_many(
+        {"_id": {"$in": ids}, "status": {"$in": sources}},
+        {"$set": {"status": new_status, "updated_at": datetime.now(timezone.utc), "status_batch": batch}},
+    )
+
+    projection = {"status": 1, "status_batch": 1, "order_date": 1, "total_amount": 1}
+    if new_status == 'Cancelled':
+        projection["order_items.product_id"] = 1
+        projection["order_items.quantity"] = 1
+    moved, seen = [], set()
+    for order in db.orders.find({"_id": {"$in": ids}}, projection):
+        seen.add(order['_id'])
+        if order.get('status_batch') == batch:
+            moved.append(order)
+        else:
+            result["skipped"].append((str(order['_id']), f"cannot change {order.get('status')} to {new_status}"))
+    result["skipped"].extend((str(oid), "not found") for oid in ids if oid not in seen)
+    result["updated"] = len(moved)
+
+    if moved and new_status == 'Cancelled':
+        # Only Pending orders can be cancelled, so that is the old status of every moved order.
+        result["restocked_products"] = _restock(db, moved)
+        sales_rollup.record_status_changes(db, moved, 'Pending', 'Cancelled')
+        catalog_cache.bump_version(db)
+    if moved:
+        dashboard_stats.invalidate()
+    return result
+
+
+def complete_for_delivery_date(db, day):
+    """Mark every Pending order due for delivery on `day` (UTC) as Completed. Returns the count."""
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    result = db.orders.update_many(
+        {"status": "Pending", "delivery_date": {"$gte": start, "$lt": start + timedelta(days=1)}},
+        {"$set": {"status": "Completed", "updated_at": datetime.now(timezone.utc)}},
+    )
+    if result.modified_count:
+        dashboard_stats.invalidate()
+    return result.modified_count
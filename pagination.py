@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are addressed by the (sort value, _id) of the last row shown instead of
+an offset, so fetching page N costs the same as fetching page 1.
+"""
+
+import base64
+from datetime import datetime, timezone
+
+from bson.objectid import ObjectId
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+
+def clamp_per_page(value, default=DEFAULT_PER_PAGE):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(value, MAX_PER_PAGE))
+
+
+def _as_utc(dt):
+    # PyMongo returns naive datetimes that are already UTC.
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def encode_cursor(dt, oid):
+    """Encode the (datetime, ObjectId) of the last row into an opaque token."""
+    millis = int(_as_utc(dt).timestamp() * 1000)
+    raw = f"{millis}:{oid}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (datetime, ObjectId) for a token, or None if it is missing/invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        millis, oid = base64.urlsafe_b64decode(padded.encode()).decode().split(':', 1)
+        return datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc), ObjectId(oid)
+    except Exception:
+        return None
+
+
+def keyset_filter(token, field):
+    """
+    Filter selecting rows strictly after the cursor for a
+    `sort([(field, -1), ("_id", -1)])` ordering. Empty when no cursor.
+    """
+    decoded = decode_cursor(token)
+    if decoded is None:
+        return {}
+    value, oid = decoded
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lt": oid}},
+    ]}
+
+
+def id_keyset_filter(token):
+    """Filter selecting rows after the cursor for a `sort("_id", -1)` ordering."""
+    try:
+        return {"_id": {"$lt": ObjectId(token)}} if token else {}
+    except Exception:
+        return {}
+
+
+def next_id_cursor(rows, per_page):
+    """Like next_cursor, for pages ordered by _id alone."""
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, str(rows[-1]['_id'])
+
+
+def next_cursor(rows, per_page, field):
+    """
+    Given up to per_page + 1 rows, trim the look-ahead row and return
+    (rows, cursor for the next page or None). A row whose sort value is not a
+    datetime (a legacy string date not yet migrated) cannot be encoded, so
+    pagination stops there instead of failing.
+    """
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    last = rows[-1]
+    if not isinstance(last.get(field), datetime):
+        return rows, None
+    return rows, encode_cursor(last[field], last['_id'])
@@ -0,0 +1,88 @@
+"""
+Password hashing policy.
+
+Hash parameters come from PASSWORD_HASH_METHOD (any Werkzeug method string,
+e.g. "pbkdf2:sha256:600000", "scrypt:32768:8:1" or just "scrypt"). Hashes
+made with other parameters still verify and are upgraded on the user's next
+successful login.
+
+Hashing is CPU-bound. With PASSWORD_POOL_SIZE > 0 each worker hashes in a
+small process pool, and at most PASSWORD_POOL_QUEUE calls may wait for it; a
+login storm then gets PasswordBusy instead of starving checkout and every
+other route served by the same worker.
+"""
+
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+POOL_SIZE = int(os.environ.get('PASSWORD_POOL_SIZE', 0))
+POOL_QUEUE = int(os.environ.get('PASSWORD_POOL_QUEUE', max(POOL_SIZE * 4, 1)))
+POOL_WAIT_SECONDS = float(os.environ.get('PASSWORD_POOL_WAIT_SECONDS', 5))
+
+
+class PasswordBusy(Exception):
+    """The hashing pool is saturated; the caller should ask the user to retry."""
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(POOL_QUEUE)
+
+
+def _get_pool():
+    # Created lazily (and re-created after fork) so each gunicorn worker owns its pool.
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn, not fork: forking a threaded worker can copy held locks into the children.
+            _pool = ProcessPoolExecutor(max_workers=POOL_SIZE, mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _run(fn, *args):
+    if POOL_SIZE <= 0:
+        return fn(*args)
+    if not _slots.acquire(timeout=POOL_WAIT_SECONDS):
+        raise PasswordBusy()
+    try:
+        return _get_pool().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, HASH_METHOD, SALT_LENGTH)
+
+
+def verify_password(stored_hash, password):
+    if not stored_hash:
+        return False
+    return _run(check_password_hash, stored_hash, password)
+
+
+@functools.lru_cache(maxsize=None)
+def canonical_method():
+    """
+    The method prefix Werkzeug writes for HASH_METHOD: it expands short names
+    ("scrypt" -> "scrypt:32768:8:1"). Found by hashing once per process, on
+    first use rather than at import, since that costs a full hash.
+    """
+    return generate_password_hash('x', HASH_METHOD, 1).partition('$')[0]
+
+
+def needs_rehash(stored_hash):
+    """True if the hash was made with different parameters than the current policy."""
+    method, _, rest = (stored_hash or '').partition('$')
+    if not rest:
+        return True
+    salt = rest.split('$', 1)[0]
+    return method != canonical_method() or len(salt) != SALT_LENGTH
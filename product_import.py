@@ -0,0 +1,262 @@
+"""
+Bulk product import and price/stock update from CSV.
+
+Rows are matched on `sku` when the column is filled, otherwise on `name`; a
+row whose sku is not known yet falls back to its name, and the matched
+product takes the sku. Names shared by several products are rejected.
+Columns other than the key are optional: a blank cell leaves that field
+unchanged, so a stock intake file only needs `sku,stock` and a price
+revision only `name,price`. Rows for unknown products are inserted and must
+carry a name and a price.
+
+The whole file is applied with one unordered bulk_write of upserts and the
+catalog version is bumped once. Used by the admin upload form and the CLI:
+
+    flask --app app_complete import-products intake.csv --stock-mode add
+"""
+
+import csv
+import math
+from datetime import datetime, timezone
+
+import click
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import catalog_cache
+import dashboard_stats
+import serializers
+
+MAX_ROWS = 20000
+STOCK_MODES = ("set", "add")
+COLUMNS = ("sku", "name", "description", "price", "stock", "unit")
+
+
+class ImportReport:
+    """Outcome of one import: counts plus per-row errors keyed by CSV line."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {"rows": self.rows, "inserted": self.inserted, "updated": self.updated,
+                "unchanged": self.unchanged, "errors": sorted(self.errors, key=lambda e: e["line"])}
+
+
+def _parse_row(raw, stock_mode):
+    """(key field, key value, fields) for a CSV row; raises ValueError with a readable message."""
+    row = {k: (v or '').strip() for k, v in raw.items() if k in COLUMNS}
+    fields = {}
+    if row.get('name'):
+        fields['name'] = row['name']
+    if row.get('description'):
+        fields['description'] = row['description']
+    if row.get('unit'):
+        fields['unit'] = row['unit']
+    if row.get('price'):
+        try:
+            fields['price'] = float(row['price'])
+        except ValueError:
+            raise ValueError(f"price {row['price']!r} is not a number")
+        if not math.isfinite(fields['price']):
+            raise ValueError(f"price {row['price']!r} is not a finite number")
+        if fields['price'] < 0:
+            raise ValueError("price cannot be negative")
+    if row.get('stock'):
+        try:
+            fields['stock'] = int(row['stock'])
+        except ValueError:
+            raise ValueError(f"stock {row['stock']!r} is not a whole number")
+        if stock_mode == 'set' and fields['stock'] < 0:
+            raise ValueError("stock cannot be negative")
+
+    if row.get('sku'):
+        return 'sku', row['sku'], fields
+    if 'name' in fields:
+        return 'name', fields.pop('name'), fields
+    raise ValueError("sku or name is required")
+
+
+def _match(key_field, key, fields, by_sku, by_name):
+    """
+    The existing product a row refers to, or None for a new product.
+    A sku row falls back to the row's name when no product has that sku yet,
+    so products created in the app (which have no sku) get one instead of a
+    duplicate. Raises ValueError when the name is ambiguous.
+    """
+    if key_field == 'sku':
+        if key in by_sku:
+            return by_sku[key]
+        name = fields.get('name')
+        if name is None:
+            return None
+        candidates = by_name.get(name, [])
+        if any(doc.get('sku') for doc in candidates):
+            raise ValueError(f"name {name!r} already belongs to a product with another sku")
+    else:
+        candidates = by_name.get(key, [])
+    if len(candidates) > 1:
+        raise ValueError(f"name {candidates[0]['name']!r} matches {len(candidates)} products; "
+                         "add a sku column to pick one")
+    return candidates[0] if candidates else None
+
+
+def _update(fields, stock_mode, now):
+    to_set = {k: v for k, v in fields.items() if k != 'stock'}
+    update = {}
+    on_insert = {"created_at": now, "schema_version": serializers.SCHEMA_VERSION}
+    for field, default in (("description", ""), ("unit", "Liter")):
+        if field not in to_set:
+            on_insert[field] = default
+    if 'stock' in fields:
+        if stock_mode == 'add':
+            update["$inc"] = {"stock": fields['stock']}
+        else:
+            to_set['stock'] = fields['stock']
+    else:
+        on_insert['stock'] = 0
+    if to_set:
+        update["$set"] = dict(to_set, updated_at=now)
+    else:
+        on_insert["updated_at"] = now
+    update["$setOnInsert"] = on_insert
+    return update
+
+
+def import_products(db, lines, stock_mode='set', dry_run=False):
+    """
+    Validate and apply a CSV (any iterable of text lines). Returns an
+    ImportReport; nothing is written for rows that fail validation.
+    """
+    if stock_mode not in STOCK_MODES:
+        raise ValueError(f"stock_mode must be one of {STOCK_MODES}")
+    report = ImportReport()
+    reader = csv.DictReader(lines)
+    try:
+        reader.fieldnames = [(h or '').strip().lower() for h in (reader.fieldnames or [])]
+        if not ({'sku', 'name'} & set(reader.fieldnames)):
+            report.error(1, "header must include a sku or name column")
+            return report
+
+        rows, seen = [], {}
+        for raw in reader:
+            line = reader.line_num
+            report.rows += 1
+            if report.rows > MAX_ROWS:
+                report.error(line, f"file has more than {MAX_ROWS} rows; split it")
+                return report
+            try:
+                key_field, key, fields = _parse_row(raw, stock_mode)
+            except ValueError as e:
+                report.error(line, str(e))
+                continue
+            if (key_field, key) in seen:
+                report.error(line, f"duplicate of line {seen[key_field, key]}")
+                continue
+            seen[key_field, key] = line
+            rows.append((line, key_field, key, fields))
+    except csv.Error as e:
+        # The rest of the file can't be trusted to line up with its rows; write nothing.
+        report.error(reader.line_num, f"malformed CSV: {e}")
+        return report
+
+    # One read finds every product a row could refer to, by sku or by name.
+    skus = [key for _, f, key, _ in rows if f == 'sku']
+    names = [key if f == 'name' else fields['name'] for _, f, key, fields in rows
+             if f == 'name' or 'name' in fields]
+    by_sku, by_name = {}, {}
+    if skus or names:
+        for doc in db.products.find({"$or": [{"sku": {"$in": skus}}, {"name": {"$in": names}}]},
+                                    {"sku": 1, "name": 1, "stock": 1}):
+            if doc.get('sku'):
+                by_sku[doc['sku']] = doc
+            by_name.setdefault(doc.get('name'), []).append(doc)
+
+    ops, op_lines, guarded = [], [], 0
+    targets = {}
+    now = datetime.now(timezone.utc)
+    for line, key_field, key, fields in rows:
+        try:
+            target = _match(key_field, key, fields, by_sku, by_name)
+        except ValueError as e:
+            report.error(line, str(e))
+            continue
+
+        if target is None:
+            if key_field == 'sku' and 'name' not in fields:
+                report.error(line, f"new product {key!r} needs a name")
+                continue
+            if 'price' not in fields:
+                report.error(line, f"new product {key!r} needs a price")
+                continue
+            if fields.get('stock', 0) < 0:
+                report.error(line, f"new product {key!r} cannot start with negative stock")
+                continue
+            ops.append(UpdateOne({key_field: key}, _update(fields, stock_mode, now), upsert=True))
+            op_lines.append(line)
+            continue
+
+        if target['_id'] in targets:
+            report.error(line, f"same product as line {targets[target['_id']]}")
+            continue
+        targets[target['_id']] = line
+        if key_field == 'sku' and not target.get('sku'):
+            fields = dict(fields, sku=key)  # matched by name: adopt the sku
+        query = {"_id": target['_id']}
+        if stock_mode == 'add' and fields.get('stock', 0) < 0:
+            if target.get('stock', 0) + fields['stock'] < 0:
+                report.error(line, f"stock would go below zero ({target.get('stock', 0)} on hand)")
+                continue
+            # Stock may have moved since it was read; never let $inc take it below zero.
+            query["stock"] = {"$gte": -fields['stock']}
+            guarded += 1
+        ops.append(UpdateOne(query, _update(fields, stock_mode, now)))
+        op_lines.append(line)
+
+    if dry_run or not ops:
+        return report
+
+    try:
+        result = db.products.bulk_write(ops, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for err in details.get("writeErrors", []):
+            report.error(op_lines[err["index"]], err.get("errmsg", "write failed"))
+    report.inserted = details.get("nUpserted", 0)
+    report.updated = details.get("nModified", 0)
+    report.unchanged = details.get("nMatched", 0) - report.updated
+    missed = len(ops) - len(details.get("writeErrors", [])) - report.inserted - details.get("nMatched", 0)
+    if guarded and missed > 0:
+        report.error(0, f"{missed} stock reductions skipped: stock changed during the import "
+                        "and would have gone below zero")
+
+    if report.inserted or report.updated:
+        catalog_cache.bump_version(db)
+        dashboard_stats.invalidate()
+    return report
+
+
+def init_app(app, db):
+    @app.cli.command('import-products')
+    @click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--stock-mode', type=click.Choice(STOCK_MODES), default='set', show_default=True,
+                  help='Replace stock, or add the stock column to current stock (intake).')
+    @click.option('--dry-run', is_flag=True, help='Validate only; write nothing.')
+    def import_products_command(csv_file, stock_mode, dry_run):
+        """Create or update products from a CSV file."""
+        report = import_products(db, csv_file, stock_mode, dry_run).as_dict()
+        click.echo(f"{report['rows']} rows: {report['inserted']} inserted, {report['updated']} updated, "
+                   f"{report['unchanged']} unchanged, {len(report['errors'])} errors"
+                   + (" (dry run)" if dry_run else ""))
+        for err in report['errors']:
+            click.echo(f"  line {err['line']}: {err['error']}")
+        if report['errors']:
+            raise SystemExit(1)
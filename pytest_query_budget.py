@@ -0,0 +1,43 @@
+"""
+pytest plugin: assert MongoDB query budgets per route.
+
+Enable it from a conftest.py by switching the profiler on before the app is
+imported and importing the fixture (tests/conftest.py does both and provides
+the `client`, `customer_client` and `admin_client` fixtures), then wrap the
+requests under test:
+
+    # conftest.py
+    import os
+    os.environ["QUERY_PROFILER"] = "1"
+    from pytest_query_budget import query_budget  # noqa: F401
+
+    # test_query_budgets.py
+    def test_admin_orders_is_not_n_plus_one(admin_client, query_budget):
+        with query_budget(max_queries=4, max_same_shape=1):
+            admin_client.get('/admin/orders')
+
+A block that exceeds its budget fails the test with every offending query
+shape listed.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+import query_profiler
+
+
+@pytest.fixture
+def query_budget():
+    if not query_profiler.ENABLED:
+        pytest.fail("query profiler is off: set QUERY_PROFILER=1 before the app is imported")
+
+    @contextmanager
+    def budget(max_queries=None, max_same_shape=1):
+        with query_profiler.capture() as log:
+            yield log
+        problems = log.violations(max_queries, max_same_shape)
+        if problems:
+            pytest.fail("Query budget exceeded:\n  " + "\n  ".join(problems), pytrace=False)
+
+    return budget
@@ -0,0 +1,240 @@
+"""
+Development query profiler: N+1 detection, query budgets and a slow-query log.
+
+Every MongoDB command a request issues is captured through command
+monitoring and grouped by query shape (the command with all literal values
+replaced by "?"). After the request the profiler logs a warning when
+
+- one shape ran more than QUERY_SAME_SHAPE_LIMIT times (an N+1 loop), or
+- the request ran more than QUERY_BUDGET commands in total,
+
+and logs each command slower than SLOW_QUERY_MS with its `explain` plan.
+Responses carry an X-Query-Count header. Set app.config['QUERY_PROFILER_STRICT']
+to raise QueryBudgetExceeded instead of warning.
+
+On by default in development (ENV unset or "development"); QUERY_PROFILER=1/0
+overrides. The pytest plugin in pytest_query_budget.py asserts budgets per route.
+"""
+
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from flask import g, request
+from pymongo import monitoring
+
+import indexes
+
+ENABLED = os.environ.get(
+    'QUERY_PROFILER', '1' if os.environ.get('ENV', 'development') == 'development' else '0') == '1'
+SAME_SHAPE_LIMIT = int(os.environ.get('QUERY_SAME_SHAPE_LIMIT', 5))
+QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 30))
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+
+# Cursor continuations belong to the query that opened the cursor.
+IGNORED_COMMANDS = {'getMore', 'killCursors', 'hello', 'ismaster', 'isMaster', 'ping', 'endSessions',
+                    'saslStart', 'saslContinue', 'buildInfo'}
+EXPLAINABLE_COMMANDS = {'find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify'}
+# The parts of each command that define its shape.
+SHAPE_FIELDS = ('filter', 'sort', 'projection', 'pipeline', 'query', 'key')
+# Driver-managed fields that must not be echoed back into explain.
+SESSION_FIELDS = {'lsid', 'txnNumber', 'autocommit', 'startTransaction', '$clusterTime', '$db',
+                  '$readPreference', 'readConcern', 'writeConcern'}
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or captured block issued more queries than allowed."""
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(v, (dict, list, tuple)) for v in value):
+            return [_normalize(v) for v in value]
+        return '?'
+    if isinstance(value, (str, int, float, bool, ObjectId, datetime, bytes)) or value is None:
+        return '?'
+    return type(value).__name__
+
+
+def query_shape(command_name, command):
+    collection = command.get(command_name)
+    parts = {field: _normalize(command[field]) for field in SHAPE_FIELDS if field in command}
+    if command_name in ('update', 'delete'):
+        # Only the per-statement filters matter; how many statements were batched does not.
+        statements = command.get('updates' if command_name == 'update' else 'deletes') or []
+        parts = {'q': sorted({repr(_normalize(s.get('q', {}))) for s in statements})}
+    return f"{command_name} {collection} {parts}" if parts else f"{command_name} {collection}"
+
+
+class QueryLog:
+    """Commands captured while a profiler scope was active."""
+
+    def __init__(self):
+        self.entries = []
+
+    @property
+    def total(self):
+        return len(self.entries)
+
+    def shapes(self):
+        return Counter(e['shape'] for e in self.entries)
+
+    def violations(self, max_queries=None, max_same_shape=None):
+        problems = []
+        if max_queries is not None and self.total > max_queries:
+            problems.append(f"{self.total} queries, budget is {max_queries}")
+        if max_same_shape is not None:
+            for shape, count in self.shapes().most_common():
+                if count <= max_same_shape:
+                    break
+                problems.append(f"{count}x same query shape (limit {max_same_shape}): {shape}")
+        return problems
+
+    def slow(self, threshold_ms=SLOW_QUERY_MS):
+        return [e for e in self.entries if e['ms'] is not None and e['ms'] > threshold_ms]
+
+
+def _active_logs():
+    return getattr(_local, 'logs', None)
+
+
+@contextmanager
+def capture():
+    """Record every command issued by this thread inside the block."""
+    log = QueryLog()
+    if not hasattr(_local, 'logs'):
+        _local.logs = []
+    _local.logs.append(log)
+    try:
+        yield log
+    finally:
+        _local.logs.remove(log)
+
+
+@contextmanager
+def _suspended():
+    previous = getattr(_local, 'logs', None)
+    _local.logs = []
+    try:
+        yield
+    finally:
+        _local.logs = previous
+
+
+class QueryListener(monitoring.CommandListener):
+    """Feeds commands into the capture scopes active on the issuing thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def started(self, event):
+        logs = _active_logs()
+        if not logs or event.command_name in IGNORED_COMMANDS:
+            return
+        entry = {
+            'command_name': event.command_name,
+            'collection': event.command.get(event.command_name),
+            'shape': query_shape(event.command_name, event.command),
+            'command': event.command,
+            'database': event.database_name,
+            'ms': None,
+        }
+        for log in logs:
+            log.entries.append(entry)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = entry
+
+    def _finish(self, event):
+        with self._lock:
+            entry = self._pending.pop((event.connection_id, event.request_id), None)
+        if entry is not None:
+            entry['ms'] = event.duration_micros / 1000
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+
+def listeners():
+    """Event listeners to pass to the MongoClient (empty when the profiler is off)."""
+    return [QueryListener()] if ENABLED else []
+
+
+def _winning_plan(explain):
+    planner = explain.get('queryPlanner')
+    if planner is None:
+        for stage in explain.get('stages', []):
+            if '$cursor' in stage:
+                planner = stage['$cursor'].get('queryPlanner')
+                break
+    plan = (planner or {}).get('winningPlan', {})
+    return plan.get('queryPlan', plan)
+
+
+def explain_plan(db, entry):
+    """Winning plan of a captured command as returned by `explain`; None if not explainable."""
+    if entry['command_name'] not in EXPLAINABLE_COMMANDS:
+        return None
+    command = {k: v for k, v in entry['command'].items() if k not in SESSION_FIELDS}
+    with _suspended():
+        explain = db.client[entry['database']].command('explain', command, verbosity='queryPlanner')
+    return _winning_plan(explain)
+
+
+def explain_summary(db, entry):
+    """Winning plan of a captured command, e.g. 'IXSCAN(order_date) > FETCH'; None if not explainable."""
+    try:
+        plan = explain_plan(db, entry)
+    except Exception as e:
+        return f"explain failed: {e}"
+    return None if plan is None else indexes.describe_plan(plan)
+
+
+def init_app(app, db):
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def start_query_capture():
+        g.query_capture = capture()
+        g.query_log = g.query_capture.__enter__()
+
+    @app.after_request
+    def check_query_budget(response):
+        scope = g.pop('query_capture', None)
+        if scope is None:
+            return response
+        log = g.pop('query_log')
+        scope.__exit__(None, None, None)
+        response.headers['X-Query-Count'] = str(log.total)
+
+        where = f"{request.method} {request.path} ({request.endpoint})"
+        for entry in log.slow():
+            plan = explain_summary(db, entry)
+            app.logger.warning("Slow query %.1fms in %s: %s%s", entry['ms'], where, entry['shape'],
+                               f" [plan: {plan}]" if plan else "")
+
+        problems = log.violations(QUERY_BUDGET, SAME_SHAPE_LIMIT)
+        if problems:
+            message = f"Query budget exceeded in {where}: " + "; ".join(problems)
+            if app.config.get('QUERY_PROFILER_STRICT'):
+                raise QueryBudgetExceeded(message)
+            app.logger.warning(message)
+        return response
+
+    @app.teardown_request
+    def end_query_capture(exc):
+        # The request failed before after_request ran: still close the scope.
+        scope = g.pop('query_capture', None)
+        if scope is not None:
+            scope.__exit__(None, None, None)
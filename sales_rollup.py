@@ -0,0 +1,160 @@
+"""
+Daily sales rollup.
+
+`sales_daily` holds one document per UTC day with the number and value of
+non-cancelled orders placed that day. Order writes keep it current with
+atomic $inc upserts, so reports read a handful of rollup documents instead
+of scanning `orders`.
+
+The release step backfills it when it is empty (the first
+deploy of the rollup). Rebuild it from scratch while no orders are being
+written with:
+
+    flask --app app_complete rebuild-sales-rollup
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import click
+from pymongo import UpdateOne
+
+COLLECTION = "sales_daily"
+
+
+def day_key(dt):
+    """UTC calendar day of a datetime as 'YYYY-MM-DD'."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime('%Y-%m-%d')
+
+
+def _inc_update(key, fields):
+    return {"$inc": fields, "$setOnInsert": {"date": datetime.strptime(key, '%Y-%m-%d')}}
+
+
+def _inc(db, order_date, fields):
+    key = day_key(order_date)
+    db[COLLECTION].update_one({"_id": key}, _inc_update(key, fields), upsert=True)
+
+
+def record_order(db, order_date, amount):
+    """Count a newly placed order."""
+    _inc(db, order_date, {"orders": 1, "revenue": float(amount)})
+
+
+def record_status_change(db, order, old_status, new_status):
+    """
+    Adjust the rollup when an order moves into or out of Cancelled.
+    `order` needs `order_date` and `total_amount`.
+    """
+    record_status_changes(db, [order], old_status, new_status)
+
+
+def record_status_changes(db, orders, old_status, new_status):
+    """record_status_change for many orders at once: one $inc upsert per day."""
+    if old_status == new_status:
+        return
+    if new_status == 'Cancelled':
+        sign = -1
+    elif old_status == 'Cancelled':
+        sign = 1
+    else:
+        return
+    per_day = {}
+    for order in orders:
+        if not isinstance(order.get('order_date'), datetime):
+            continue
+        row = per_day.setdefault(day_key(order['order_date']), {"orders": 0, "revenue": 0.0, "cancelled_orders": 0})
+        row["orders"] += sign
+        row["revenue"] += sign * float(order.get('total_amount', 0))
+        row["cancelled_orders"] -= sign
+    if per_day:
+        db[COLLECTION].bulk_write([UpdateOne({"_id": key}, _inc_update(key, fields), upsert=True)
+                                   for key, fields in per_day.items()], ordered=False)
+
+
+def _order_date_bound(db, direction):
+    doc = db.orders.find_one({"order_date": {"$type": "date"}}, {"order_date": 1},
+                             sort=[("order_date", direction)])
+    return doc["order_date"] if doc else None
+
+
+def _day_row(db, start):
+    is_cancelled = {"$eq": ["$status", "Cancelled"]}
+    rows = list(db.orders.aggregate([
+        {"$match": {"order_date": {"$gte": start, "$lt": start + timedelta(days=1)}}},
+        {"$group": {
+            "_id": None,
+            "orders": {"$sum": {"$cond": [is_cancelled, 0, 1]}},
+            "revenue": {"$sum": {"$cond": [is_cancelled, 0, {"$toDouble": "$total_amount"}]}},
+            "cancelled_orders": {"$sum": {"$cond": [is_cancelled, 1, 0]}},
+        }},
+    ]))
+    return rows[0] if rows else None
+
+
+def rebuild(db):
+    """
+    Recompute the rollup from `orders`, one day at a time. Returns the number
+    of days written.
+
+    Each day's row is replaced as soon as that day is summed, so the rest of
+    the collection stays live. An order written to a day while that day is
+    being summed can still be lost, so run this when no orders are being
+    placed or cancelled (a release step, or `backfill` on an empty rollup).
+    Orders with legacy string dates are skipped: run `migrate-dates` first.
+    """
+    first, last = _order_date_bound(db, 1), _order_date_bound(db, -1)
+    if first is None:
+        return 0
+    day = datetime.strptime(day_key(first), '%Y-%m-%d')
+    end = datetime.strptime(day_key(last), '%Y-%m-%d')
+    written = 0
+    while day <= end:
+        key = day.strftime('%Y-%m-%d')
+        row = _day_row(db, day)
+        if row is None:
+            db[COLLECTION].delete_one({"_id": key})
+        else:
+            row.update(_id=key, date=day)
+            db[COLLECTION].replace_one({"_id": key}, row, upsert=True)
+            written += 1
+        day += timedelta(days=1)
+    return written
+
+
+def backfill(db):
+    """Rebuild only when the rollup is empty but orders exist (e.g. the first deploy). Returns days written."""
+    if db[COLLECTION].find_one({}, {"_id": 1}) is not None:
+        return 0
+    if db.orders.find_one({}, {"_id": 1}) is None:
+        return 0
+    return rebuild(db)
+
+
+def recent_days(db, days):
+    """Rollup rows for the last `days` days (newest first)."""
+    since = datetime.now(timezone.utc) - timedelta(days=days - 1)
+    return list(db[COLLECTION].find({"_id": {"$gte": day_key(since)}}).sort("_id", -1))
+
+
+def totals(db):
+    """All-time order count and revenue, summed over the rollup rows."""
+    for row in db[COLLECTION].aggregate([
+        {"$group": {"_id": None, "orders": {"$sum": "$orders"}, "revenue": {"$sum": "$revenue"}}}
+    ]):
+        return {"orders": row["orders"], "revenue": row["revenue"]}
+    return {"orders": 0, "revenue": 0.0}
+
+
+def init_app(app, db):
+    @app.cli.command('rebuild-sales-rollup')
+    @click.option('--if-empty', is_flag=True, help='Only backfill when sales_daily has no rows yet.')
+    def rebuild_sales_rollup_command(if_empty):
+        """Rebuild the sales_daily rollup from all orders (run while no orders are being written)."""
+        if if_empty:
+            days = backfill(db)
+            click.echo(f"sales_daily backfilled: {days} days" if days else "sales_daily already populated")
+        else:
+            days = rebuild(db)
+            click.echo(f"sales_daily rebuilt: {days} days")
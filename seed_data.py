@@ -0,0 +1,341 @@
+"""
+Bulk synthetic data seeder for staging and performance testing.
+
+Generates customers, a dairy product catalog and months of orders with
+weekly and yearly seasonality and morning/evening peaks. Orders are written
+with large unordered insert_many batches, optionally from several processes,
+so millions of orders load in minutes:
+
+    flask --app app_complete seed-data --customers 20000 --months 12 --orders-per-day 5000 --processes 4 --drop
+    python seed_data.py --mongo-uri mongodb://127.0.0.1:27017/dairy_staging --months 6
+
+Every document, including its _id, is derived from (--seed, --end, index),
+so the same arguments always produce the same data regardless of how many
+processes do the writing.
+"""
+
+import argparse
+import bisect
+import itertools
+import math
+import multiprocessing
+import random
+import struct
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+from pymongo.uri_parser import parse_uri
+
+import bootstrap
+import catalog_cache
+import indexes
+import passwords
+import sales_rollup
+import serializers
+
+BATCH_SIZE = 10000
+
+# name, description, price, unit, relative popularity
+CATALOG = [
+    ("Milk (1L)", "Fresh whole cow milk", 50.0, "Liter", 30),
+    ("Toned Milk (1L)", "Toned milk, 3% fat", 46.0, "Liter", 20),
+    ("Buffalo Milk (1L)", "Rich buffalo milk", 64.0, "Liter", 10),
+    ("Curd (500g)", "Set curd", 45.0, "grams", 14),
+    ("Yogurt (500ml)", "Creamy yogurt", 80.0, "ml", 8),
+    ("Buttermilk (1L)", "Spiced buttermilk", 40.0, "Liter", 9),
+    ("Lassi (200ml)", "Sweet lassi", 25.0, "ml", 7),
+    ("Paneer (200g)", "Fresh cottage cheese", 90.0, "grams", 9),
+    ("Paneer (500g)", "Fresh cottage cheese", 220.0, "grams", 4),
+    ("Butter (100g)", "Salted table butter", 56.0, "grams", 6),
+    ("Ghee (500ml)", "Pure clarified butter", 500.0, "ml", 3),
+    ("Ghee (1L)", "Pure clarified butter", 960.0, "Liter", 2),
+    ("Cheese Slices (200g)", "Processed cheese slices", 150.0, "grams", 3),
+    ("Fresh Cream (250ml)", "Cooking cream", 70.0, "ml", 3),
+    ("Khoa (250g)", "Dried milk solids", 120.0, "grams", 2),
+    ("Flavoured Milk (200ml)", "Chocolate milk", 30.0, "ml", 5),
+]
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Arjun", "Sai", "Reyansh", "Krishna", "Ishaan", "Ananya", "Diya",
+               "Priya", "Kavya", "Saanvi", "Meera", "Lakshmi", "Rohan", "Rahul", "Neha", "Pooja", "Sneha"]
+LAST_NAMES = ["Sharma", "Verma", "Reddy", "Naidu", "Patel", "Iyer", "Rao", "Gupta", "Kumar", "Singh",
+              "Nair", "Menon", "Joshi", "Desai", "Chowdary", "Pillai"]
+STREETS = ["MG Road", "Station Road", "Gandhi Nagar", "Nehru Street", "Temple Street", "Lake View Road",
+           "Market Road", "Park Avenue"]
+CITIES = ["Hyderabad", "Vijayawada", "Guntur", "Visakhapatnam", "Bengaluru", "Chennai", "Pune"]
+
+# Demand multipliers: Monday..Sunday, and hour of day (deliveries are ordered
+# early morning and in the evening).
+WEEKDAY_FACTOR = [0.95, 0.9, 0.9, 0.95, 1.05, 1.2, 1.25]
+HOUR_WEIGHTS = [1, 1, 1, 1, 2, 6, 12, 14, 10, 6, 4, 4, 4, 3, 3, 4, 6, 10, 12, 9, 6, 4, 2, 1]
+
+_HOUR_CUM = list(itertools.accumulate(HOUR_WEIGHTS))
+_PRODUCT_CUM = list(itertools.accumulate(p[4] for p in CATALOG))
+
+# Leading byte of the generated ObjectId counter, so ids never collide across kinds.
+_KIND_CUSTOMER, _KIND_PRODUCT, _KIND_ORDER = 1, 2, 3
+
+
+def _oid(when, kind, serial):
+    return ObjectId(struct.pack(">IQ", int(when.timestamp()), (kind << 56) | serial))
+
+
+def _customer_created_at(start, index):
+    return start - timedelta(minutes=7 * (index + 1))
+
+
+def customer_id(start, index):
+    return _oid(_customer_created_at(start, index), _KIND_CUSTOMER, index)
+
+
+def build_customers(count, start, seed, password_hash):
+    rnd = random.Random(f"{seed}:customers")
+    version = serializers.SCHEMA_VERSION
+    for i in range(count):
+        first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+        created_at = _customer_created_at(start, i)
+        yield {
+            "_id": _oid(created_at, _KIND_CUSTOMER, i),
+            "username": f"{first}.{last}{i}".lower(),
+            "email": f"{first}.{last}{i}@example.com".lower(),
+            "password": password_hash,
+            "phone": f"{rnd.choice('6789')}{rnd.randrange(10 ** 9):09d}",
+            "address": f"{rnd.randint(1, 999)} {rnd.choice(STREETS)}, {rnd.choice(CITIES)}",
+            "is_admin": False,
+            "created_at": created_at,
+            "total_orders": 0,
+            "reset_token": None,
+            "reset_token_expiry": None,
+            "schema_version": version,
+        }
+
+
+def build_products(start):
+    version = serializers.SCHEMA_VERSION
+    return [{
+        "_id": _oid(start, _KIND_PRODUCT, i),
+        "name": name,
+        "description": description,
+        "price": price,
+        "stock": 100000,
+        "unit": unit,
+        "created_at": start,
+        "schema_version": version,
+    } for i, (name, description, price, unit, _) in enumerate(CATALOG)]
+
+
+def _daily_volume(rnd, day, orders_per_day):
+    season = 1 + 0.15 * math.sin(2 * math.pi * (day.timetuple().tm_yday - 80) / 365)
+    return max(0, round(orders_per_day * WEEKDAY_FACTOR[day.weekday()] * season * rnd.uniform(0.9, 1.1)))
+
+
+def build_orders_for_day(day_index, start, now, seed, orders_per_day, customer_count, products):
+    """All orders placed on one day; a pure function of its arguments."""
+    rnd = random.Random(f"{seed}:day:{day_index}")
+    day = start + timedelta(days=day_index)
+    # Customer activity follows a long tail: a few regulars place most orders.
+    cum_weights = _customer_cum_weights(customer_count)
+    version = serializers.SCHEMA_VERSION
+
+    for n in range(_daily_volume(rnd, day, orders_per_day)):
+        order_date = day + timedelta(hours=rnd.choices(range(24), cum_weights=_HOUR_CUM)[0],
+                                     minutes=rnd.randrange(60), seconds=rnd.randrange(60))
+        customer = bisect.bisect_left(cum_weights, rnd.random() * cum_weights[-1])
+        lines = {}
+        for _ in range(rnd.choices([1, 2, 3, 4], [45, 30, 15, 10])[0]):
+            index = rnd.choices(range(len(products)), cum_weights=_PRODUCT_CUM)[0]
+            lines[index] = lines.get(index, 0) + rnd.choices([1, 2, 3, 5], [60, 25, 10, 5])[0]
+        order_items = []
+        for index, quantity in sorted(lines.items()):
+            prod = products[index]
+            order_items.append({
+                "product_id": prod["_id"],
+                "product_name": prod["name"],
+                "product_unit": prod["unit"],
+                "quantity": quantity,
+                "price": prod["price"],
+                "subtotal": prod["price"] * quantity,
+            })
+        delivery_date = (order_date + timedelta(days=1)).replace(hour=6, minute=0, second=0)
+        if delivery_date > now:
+            status = rnd.choices(["Pending", "Cancelled"], [95, 5])[0]
+        else:
+            status = rnd.choices(["Completed", "Cancelled"], [94, 6])[0]
+        yield {
+            "_id": _oid(order_date, _KIND_ORDER, (day_index << 24) | n),
+            "user_id": customer_id(start, customer),
+            "total_amount": sum(it["subtotal"] for it in order_items),
+            "status": status,
+            "order_date": order_date,
+            "delivery_date": delivery_date,
+            "updated_at": order_date,
+            "order_items": order_items,
+            "schema_version": version,
+        }
+
+
+_cum_weights_cache = {}
+
+
+def _customer_cum_weights(count):
+    weights = _cum_weights_cache.get(count)
+    if weights is None:
+        weights = _cum_weights_cache[count] = list(itertools.accumulate(1 / math.sqrt(i + 1) for i in range(count)))
+    return weights
+
+
+# ----------------- Writers -----------------
+
+_worker = {}
+
+
+def _init_worker(mongo_uri, db_name, options):
+    _worker["db"] = MongoClient(mongo_uri)[db_name]
+    _worker["options"] = options
+
+
+def _insert_days(days):
+    """Generate and insert the orders for a chunk of days; returns the count."""
+    db, opts = _worker["db"], _worker["options"]
+    written, batch = 0, []
+    for day_index in days:
+        for order in build_orders_for_day(day_index, opts["start"], opts["now"], opts["seed"],
+                                          opts["orders_per_day"], opts["customers"], opts["products"]):
+            batch.append(order)
+            if len(batch) >= opts["batch_size"]:
+                db.orders.insert_many(batch, ordered=False)
+                written += len(batch)
+                batch = []
+    if batch:
+        db.orders.insert_many(batch, ordered=False)
+        written += len(batch)
+    return written
+
+
+def _insert_batched(collection, docs, batch_size):
+    batch, written = [], 0
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        written += len(batch)
+    return written
+
+
+def seed(mongo_uri, db_name, customers=5000, months=6, orders_per_day=1000, seed_value=42, end=None,
+         processes=1, batch_size=BATCH_SIZE, drop=False, password='admin123', log=print):
+    """Load a synthetic dataset; every account, admin included, gets `password`. Returns a summary dict."""
+    started = time.perf_counter()
+    end = end or datetime.now(timezone.utc)
+    end = end.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start = end - timedelta(days=round(months * 30.4))
+    days = (end - start).days
+
+    client = MongoClient(mongo_uri)
+    db = client[db_name]
+    if drop:
+        for name in ("users", "products", "orders", sales_rollup.COLLECTION):
+            db.drop_collection(name)
+    elif db.orders.estimated_document_count() or db.products.estimated_document_count():
+        raise click.ClickException(f"{db_name} already has products or orders; pass --drop to replace them")
+
+    password_hash = passwords.hash_password(password)
+    db.users.update_one({"email": bootstrap.DEFAULT_ADMIN_EMAIL}, {"$setOnInsert": {
+        "username": "admin", "email": bootstrap.DEFAULT_ADMIN_EMAIL, "password": password_hash,
+        "phone": "9999999999", "address": "Dairy Management HQ", "is_admin": True,
+        "created_at": start, "reset_token": None, "reset_token_expiry": None,
+        "schema_version": serializers.SCHEMA_VERSION,
+    }}, upsert=True)
+    written_customers = _insert_batched(db.users, build_customers(customers, start, seed_value, password_hash),
+                                        batch_size)
+    products = build_products(start)
+    db.products.insert_many(products, ordered=False)
+    log(f"customers: {written_customers}, products: {len(products)}")
+
+    options = {"start": start, "now": end, "seed": seed_value, "orders_per_day": orders_per_day,
+               "customers": customers, "products": products, "batch_size": batch_size}
+    chunks = [range(i, min(i + 7, days)) for i in range(0, days, 7)]
+    written_orders = 0
+    if processes > 1:
+        # spawn, not fork: each worker opens its own MongoClient.
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(processes, initializer=_init_worker, initargs=(mongo_uri, db_name, options)) as pool:
+            for count in pool.imap_unordered(_insert_days, chunks):
+                written_orders += count
+                log(f"orders: {written_orders}")
+    else:
+        _init_worker(mongo_uri, db_name, options)
+        for chunk in chunks:
+            written_orders += _insert_days(chunk)
+            log(f"orders: {written_orders}")
+    load_seconds = time.perf_counter() - started
+
+    # Indexes are cheaper to build once after the bulk load than to maintain during it.
+    for collection, error in indexes.ensure_indexes(db):
+        log(f"Index creation failed for {collection}: {error}")
+    db.orders.aggregate([
+        {"$group": {"_id": "$user_id", "total_orders": {"$sum": 1}}},
+        {"$merge": {"into": "users", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ])
+    sales_rollup.rebuild(db)
+    catalog_cache.bump_version(db)
+
+    return {
+        "customers": written_customers,
+        "products": len(products),
+        "orders": written_orders,
+        "days": days,
+        "load_seconds": round(load_seconds, 1),
+        "total_seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+def format_summary(summary):
+    rate = summary["orders"] / summary["load_seconds"] if summary["load_seconds"] else 0
+    return (f"Seeded {summary['customers']} customers, {summary['products']} products and "
+            f"{summary['orders']} orders over {summary['days']} days in {summary['total_seconds']}s "
+            f"({rate:.0f} orders/s)")
+
+
+def _parse_end(value):
+    return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc) if value else None
+
+
+def init_app(app, db):
+    @app.cli.command('seed-data')
+    @click.option('--customers', default=5000, show_default=True)
+    @click.option('--months', default=6.0, show_default=True)
+    @click.option('--orders-per-day', default=1000, show_default=True)
+    @click.option('--seed', 'seed_value', default=42, show_default=True)
+    @click.option('--end', help='Last order day (YYYY-MM-DD); defaults to today.')
+    @click.option('--processes', default=1, show_default=True)
+    @click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+    @click.option('--drop', is_flag=True, help='Drop users, products, orders and the sales rollup first.')
+    def seed_data_command(customers, months, orders_per_day, seed_value, end, processes, batch_size, drop):
+        """Load a deterministic synthetic dataset."""
+        summary = seed(app.config["MONGO_URI"], db.name, customers, months, orders_per_day, seed_value,
+                       _parse_end(end), processes, batch_size, drop, log=click.echo)
+        click.echo(format_summary(summary))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mongo-uri', default='mongodb://127.0.0.1:27017/dairy_management_db')
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--months', type=float, default=6)
+    parser.add_argument('--orders-per-day', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', help='Last order day (YYYY-MM-DD); defaults to today.')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--drop', action='store_true')
+    args = parser.parse_args()
+    db_name = parse_uri(args.mongo_uri)["database"] or "dairy_management_db"
+    print(format_summary(seed(args.mongo_uri, db_name, args.customers, args.months, args.orders_per_day,
+                              args.seed, _parse_end(args.end), args.processes, args.batch_size, args.drop)))
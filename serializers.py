@@ -0,0 +1,153 @@
+"""
+Canonical view serializers for orders, users and products, plus the
+migration that makes them cheap.
+
+Stored documents are normalized once by `flask migrate-dates`: every date
+field becomes a BSON datetime and the document is stamped with
+SCHEMA_VERSION. Read paths can therefore hand documents straight to the
+templates after stringifying ids, with no per-document type sniffing.
+
+    flask --app app_complete migrate-dates
+"""
+
+from datetime import datetime, timezone
+
+import click
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+SCHEMA_VERSION = 2
+MIGRATION_BATCH_SIZE = 1000
+
+# Date fields per collection; `required` fields fall back to the _id timestamp
+# when a legacy value cannot be parsed, the others are cleared.
+DATE_FIELDS = {
+    "orders": {"order_date": True, "delivery_date": False, "updated_at": False},
+    "users": {"created_at": True},
+    "products": {"created_at": True},
+}
+
+LEGACY_DATE_FORMATS = ("%d-%m-%Y %H:%M", "%d-%m-%Y", "%d/%m/%Y")
+
+
+# ----------------- Read-path serializers -----------------
+
+def order(doc):
+    """Prepare an order document for a template or JSON response, in place."""
+    doc['_id'] = str(doc['_id'])
+    if 'user_id' in doc:
+        doc['user_id'] = str(doc['user_id'])
+    items = doc.get('order_items')
+    if items is None:
+        doc['order_items'] = []
+    else:
+        for it in items:
+            if 'product_id' in it:
+                it['product_id'] = str(it['product_id'])
+    return doc
+
+
+def orders(docs):
+    return [order(d) for d in docs]
+
+
+def user(doc):
+    doc['_id'] = str(doc['_id'])
+    return doc
+
+
+def product(doc):
+    doc['_id'] = str(doc['_id'])
+    if isinstance(doc.get('created_at'), datetime):
+        doc['created_at'] = doc['created_at'].isoformat()
+    return doc
+
+
+def products(docs):
+    return [product(d) for d in docs]
+
+
+# ----------------- Migration -----------------
+
+def parse_legacy_date(value):
+    """Best-effort parse of a date stored as a string; naive values are UTC."""
+    text = value.strip()
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = None
+        for fmt in LEGACY_DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _normalize(doc, fields):
+    """$set/$unset for one document, and how many fields could not be parsed."""
+    to_set, to_unset, unparsed = {"schema_version": SCHEMA_VERSION}, {}, 0
+    for field, required in fields.items():
+        value = doc.get(field)
+        if not isinstance(value, str):
+            continue
+        parsed = parse_legacy_date(value) if value.strip() else None
+        if parsed is None:
+            unparsed += 1
+            if required and isinstance(doc['_id'], ObjectId):
+                parsed = doc['_id'].generation_time
+        if parsed is None:
+            to_unset[field] = ""
+        else:
+            to_set[field] = parsed
+    update = {"$set": to_set}
+    if to_unset:
+        update["$unset"] = to_unset
+    return update, unparsed
+
+
+def migrate_collection(collection, fields, batch_size=MIGRATION_BATCH_SIZE):
+    """
+    Normalize one collection in _id-ordered batches. Documents already at
+    SCHEMA_VERSION are skipped, so an interrupted run can simply be restarted.
+    """
+    stats = {"scanned": 0, "rewritten": 0, "unparsed": 0}
+    projection = {field: 1 for field in fields}
+    pending = {"schema_version": {"$ne": SCHEMA_VERSION}}
+    last_id = None
+    while True:
+        query = pending if last_id is None else {"$and": [pending, {"_id": {"$gt": last_id}}]}
+        batch = list(collection.find(query, projection).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+        ops = []
+        for doc in batch:
+            update, unparsed = _normalize(doc, fields)
+            stats["unparsed"] += unparsed
+            if len(update["$set"]) > 1 or "$unset" in update:
+                stats["rewritten"] += 1
+            ops.append(UpdateOne({"_id": doc["_id"], **pending}, update))
+        collection.bulk_write(ops, ordered=False)
+        stats["scanned"] += len(batch)
+        last_id = batch[-1]["_id"]
+    return stats
+
+
+def migrate(db, batch_size=MIGRATION_BATCH_SIZE):
+    return {name: migrate_collection(db[name], fields, batch_size) for name, fields in DATE_FIELDS.items()}
+
+
+def init_app(app, db):
+    @app.cli.command('migrate-dates')
+    def migrate_dates_command():
+        """Rewrite legacy string dates as datetimes and stamp schema_version."""
+        for name, stats in migrate(db).items():
+            click.echo(f"{name}: scanned {stats['scanned']}, rewritten {stats['rewritten']}, "
+                       f"unparseable {stats['unparsed']}")
@@ -0,0 +1,22 @@
+function toggleDeliveryAddress() {
+    const deliveryMethod = document.querySelector('input[name="delivery_method"]:checked').value;
+    const addressCard = document.getElementById('deliveryAddressCard');
+    const addressInput = document.querySelector('input[name="delivery_date"]');
+
+    if (deliveryMethod === 'Pickup') {
+        addressCard.style.display = 'none';
+        addressInput.required = false;
+    } else {
+        addressCard.style.display = 'block';
+        addressInput.required = true;
+    }
+}
+
+// Set minimum delivery date to today + 1 day
+document.addEventListener('DOMContentLoaded', function() {
+    const dateInput = document.querySelector('input[name="delivery_date"]');
+    const tomorrow = new Date();
+    tomorrow.setDate(tomorrow.getDate() + 1);
+    dateInput.min = tomorrow.toISOString().split('T')[0];
+    dateInput.value = tomorrow.toISOString().split('T')[0];
+});
@@ -0,0 +1,111 @@
+// Expects `allProducts` to be defined by the page (see user_dashboard.html).
+
+let cart = [];
+
+function addToCart(productId, button) {
+    productId = productId.toString();
+
+    const input = button.parentElement.querySelector('.quantity-input');
+    const quantity = parseFloat(input.value);
+
+    const product = allProducts.find(p => p._id === productId);
+
+    if (!product) {
+        alert("Product not found!");
+        return;
+    }
+
+    if (quantity > product.stock) {
+        alert('Not enough stock available');
+        return;
+    }
+
+    const existing = cart.find(item => item.product_id === productId);
+
+    if (existing) {
+        existing.quantity += quantity;
+    } else {
+        cart.push({
+            product_id: productId,
+            name: product.name,
+            price: product.price,
+            quantity: quantity
+        });
+    }
+
+    updateCartDisplay();
+    input.value = 1;
+}
+
+function updateCartDisplay() {
+    const cartItems = document.getElementById('cart-items');
+    const cartTable = document.getElementById('cart-table');
+    const cartEmpty = document.getElementById('cart-empty');
+    const totalContainer = document.getElementById('total-container');
+    const checkoutBtn = document.getElementById('checkout-btn');
+
+    if (cart.length === 0) {
+        cartTable.style.display = 'none';
+        cartEmpty.style.display = 'block';
+        totalContainer.style.display = 'none';
+        checkoutBtn.style.display = 'none';
+        return;
+    }
+
+    cartTable.style.display = 'table';
+    cartEmpty.style.display = 'none';
+    totalContainer.style.display = 'block';
+    checkoutBtn.style.display = 'block';
+
+    cartItems.innerHTML = '';
+    let total = 0;
+
+    cart.forEach((item, index) => {
+        const subtotal = item.price * item.quantity;
+        total += subtotal;
+
+        cartItems.innerHTML += `
+            <tr>
+                <td><strong>${item.name}</strong></td>
+                <td>${item.quantity}</td>
+                <td>₹${item.price}</td>
+                <td>₹${subtotal.toFixed(2)}</td>
+                <td><button class="btn btn-danger" onclick="removeFromCart(${index})">Remove</button></td>
+            </tr>
+        `;
+    });
+
+    document.getElementById('cart-total').textContent = '₹' + total.toFixed(2);
+}
+
+function removeFromCart(index) {
+    cart.splice(index, 1);
+    updateCartDisplay();
+}
+
+function checkout() {
+    if (cart.length === 0) {
+        alert('Cart is empty');
+        return;
+    }
+
+    fetch('/user/place-order', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ items: cart })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert(data.message);
+            cart = [];
+            updateCartDisplay();
+            window.location.href = '/user/receipt/' + data.order_id;
+        } else {
+            alert('Error: ' + data.message);
+        }
+    })
+    .catch(error => alert('Error placing order: ' + error));
+}
+
+updateCartDisplay();
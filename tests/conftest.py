@@ -0,0 +1,132 @@
+"""
+Shared fixtures.
+
+Tests run the real app against a throwaway database on a local mongod
+(TEST_MONGO_HOST, default mongodb://127.0.0.1:27017), named per session and
+dropped at the end, so they never touch the database MONGO_URI points at.
+Tests that need the database are skipped when no mongod is reachable.
+
+The query profiler is switched on before the app is imported so tests can
+capture the commands a request issues (see pytest_query_budget.py).
+"""
+
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEST_MONGO_HOST = os.environ.get('TEST_MONGO_HOST', 'mongodb://127.0.0.1:27017')
+TEST_DB_NAME = f"dairy_test_{uuid.uuid4().hex[:12]}"
+
+# Must be in place before app_complete is imported.
+os.environ['MONGO_URI'] = f"{TEST_MONGO_HOST.rstrip('/')}/{TEST_DB_NAME}"
+os.environ['QUERY_PROFILER'] = '1'
+os.environ.pop('ENV', None)
+
+from pytest_query_budget import query_budget  # noqa: E402,F401  (fixture)
+
+CUSTOMER_ORDERS = 30
+
+
+def _mongo_available():
+    from pymongo import MongoClient
+    client = MongoClient(TEST_MONGO_HOST, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+@pytest.fixture(scope='session')
+def app():
+    if not _mongo_available():
+        pytest.skip(f"no mongod reachable at {TEST_MONGO_HOST}")
+    import app_complete
+    import bootstrap
+    import indexes
+
+    app_complete.app.config.update(TESTING=True)
+    assert not indexes.ensure_indexes(app_complete.db)
+    assert bootstrap.run_bootstrap(app_complete.db)['status'] in ('initialized', 'already_initialized')
+    yield app_complete.app
+    app_complete.db.client.drop_database(TEST_DB_NAME)
+
+
+@pytest.fixture(scope='session')
+def db(app):
+    import app_complete
+    return app_complete.db
+
+
+def make_user(db, username, is_admin=False):
+    import passwords
+    import serializers
+    return db.users.insert_one({
+        "username": username, "email": f"{username}@example.com",
+        "password": passwords.hash_password('test-password'), "phone": f"9{uuid.uuid4().int % 10**9:09d}",
+        "address": "1 Test Street", "is_admin": is_admin, "created_at": datetime.now(timezone.utc),
+        "schema_version": serializers.SCHEMA_VERSION,
+    }).inserted_id
+
+
+def logged_in_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = str(user_id)
+    return client
+
+
+@pytest.fixture(scope='session')
+def customer_id(db):
+    """A customer with CUSTOMER_ORDERS orders spread over the last month."""
+    import sales_rollup
+    import serializers
+
+    user_id = make_user(db, f"customer-{uuid.uuid4().hex[:8]}")
+    products = list(db.products.find({}, {"name": 1, "price": 1, "unit": 1}))
+    now = datetime.now(timezone.utc)
+    orders = []
+    for i in range(CUSTOMER_ORDERS):
+        prod = products[i % len(products)]
+        order_date = now - timedelta(days=i, hours=i % 7)
+        orders.append({
+            "user_id": user_id, "total_amount": prod["price"] * 2,
+            "status": ("Pending", "Completed", "Cancelled")[i % 3],
+            "order_date": order_date, "delivery_date": order_date + timedelta(days=1), "updated_at": order_date,
+            "order_items": [{"product_id": prod["_id"], "product_name": prod["name"], "product_unit": prod["unit"],
+                             "quantity": 2, "price": prod["price"], "subtotal": prod["price"] * 2}],
+            "schema_version": serializers.SCHEMA_VERSION,
+        })
+    db.orders.insert_many(orders)
+    sales_rollup.rebuild(db)
+    return user_id
+
+
+@pytest.fixture(scope='session')
+def admin_id(db):
+    import bootstrap
+    return db.users.find_one({"email": bootstrap.DEFAULT_ADMIN_EMAIL}, {"_id": 1})['_id']
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def customer_client(app, customer_id):
+    return logged_in_client(app, customer_id)
+
+
+@pytest.fixture
+def admin_client(app, admin_id, customer_id):
+    # customer_id makes sure the admin pages have orders to show.
+    return logged_in_client(app, admin_id)
@@ -0,0 +1,16 @@
+"""
+JSON API authentication.
+"""
+
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/api/v1/orders', '/api/v1/orders/0123456789abcdef01234567'])
+@pytest.mark.parametrize('user_id', [None, 'not-an-object-id', 12345])
+def test_orders_need_a_valid_session(client, path, user_id):
+    if user_id is not None:
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+    response = client.get(path)
+    assert response.status_code == 401
+    assert response.get_json() == {'error': 'authentication required'}
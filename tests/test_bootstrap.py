@@ -0,0 +1,60 @@
+"""
+Bootstrap runs once per process; steady-state requests must not repeat any
+of it (the init_flags check, index creation, the admin upsert or seeding).
+"""
+
+import pytest
+
+import query_profiler
+
+ANONYMOUS_ROUTES = ['/', '/login', '/register', '/forgot-password']
+STEADY_STATE_REQUESTS = 5
+
+
+def bootstrap_commands(log):
+    """Captured commands that belong to bootstrap rather than to serving the request."""
+    found = []
+    for entry in log.entries:
+        name, command = entry['command_name'], entry['command']
+        if entry['collection'] == 'init_flags' or name == 'createIndexes':
+            found.append(entry['shape'])
+        elif name == 'insert' and entry['collection'] in ('users', 'products'):
+            found.append(entry['shape'])
+        elif name == 'update' and entry['collection'] == 'users' \
+                and any(u.get('upsert') for u in command.get('updates', [])):
+            found.append(entry['shape'])
+    return found
+
+
+def steady_state(client, path):
+    client.get(path)  # first request may warm per-worker caches
+    with query_profiler.capture() as log:
+        for _ in range(STEADY_STATE_REQUESTS):
+            client.get(path)
+    return log
+
+
+def test_bootstrap_is_done_once(app, db):
+    import bootstrap
+    assert bootstrap.is_initialized()
+    report = bootstrap.run_bootstrap(db)
+    assert report['status'] == 'already_initialized'
+    assert not report['admin_created'] and report['products_inserted'] == 0
+
+
+@pytest.mark.parametrize('path', ANONYMOUS_ROUTES)
+def test_anonymous_pages_issue_no_commands(client, path):
+    log = steady_state(client, path)
+    assert log.total == 0, log.shapes()
+
+
+@pytest.mark.parametrize('client_fixture, path', [
+    ('client', '/api/v1/products'),
+    ('customer_client', '/user/dashboard'),
+    ('customer_client', '/user/orders'),
+    ('admin_client', '/admin/dashboard'),
+    ('admin_client', '/admin/products'),
+])
+def test_steady_state_requests_issue_no_bootstrap_commands(request, client_fixture, path):
+    log = steady_state(request.getfixturevalue(client_fixture), path)
+    assert bootstrap_commands(log) == []
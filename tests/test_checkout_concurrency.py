@@ -0,0 +1,62 @@
+"""
+Parallel checkouts against limited stock must never oversell: every request
+either places its order or is refused with a 400, and the units sold match
+the orders accepted.
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+
+STOCK = 20
+BUYERS = 100
+THREADS = 16
+
+
+@pytest.fixture
+def limited_product(db):
+    product_id = db.products.insert_one({
+        "name": f"Concurrency Milk {uuid.uuid4().hex[:8]}", "description": "", "price": 50.0,
+        "stock": STOCK, "unit": "Liter", "created_at": datetime.now(timezone.utc),
+    }).inserted_id
+    yield product_id
+    db.products.delete_one({"_id": product_id})
+
+
+@pytest.fixture
+def buyer_id(db):
+    user_id = db.users.insert_one({
+        "username": f"buyer-{uuid.uuid4().hex[:8]}", "email": f"buyer-{uuid.uuid4().hex[:8]}@example.com",
+        "password": "", "phone": "", "address": "", "is_admin": False, "created_at": datetime.now(timezone.utc),
+    }).inserted_id
+    yield user_id
+    db.orders.delete_many({"user_id": user_id})
+    db.users.delete_one({"_id": user_id})
+
+
+@pytest.mark.parametrize('quantity', [1, 3])
+def test_parallel_checkouts_never_oversell(app, db, limited_product, buyer_id, quantity):
+    def buy(_):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = str(buyer_id)
+        response = client.post('/user/place-order', json={
+            "items": [{"product_id": str(limited_product), "quantity": quantity}]
+        })
+        return response.status_code, response.get_json()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(buy, range(BUYERS)))
+
+    accepted = 0
+    for status, body in results:
+        assert (status, body['success']) in ((200, True), (400, False)), (status, body)
+        accepted += body['success']
+
+    final_stock = db.products.find_one({"_id": limited_product}, {"stock": 1})['stock']
+    assert final_stock >= 0
+    assert accepted == STOCK // quantity
+    assert final_stock == STOCK - accepted * quantity
+    assert db.orders.count_documents({"user_id": buyer_id}) == accepted
@@ -0,0 +1,76 @@
+"""
+Exports: date validation on the endpoint, and flat memory while streaming.
+"""
+
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson.objectid import ObjectId
+
+import exports
+
+SMALL, LARGE = 2000, 20000
+
+
+@pytest.mark.parametrize('query', ['from=2025-13-01', 'to=yesterday', 'from=2025-01-01&to=01/02/2025'])
+def test_malformed_date_is_rejected(admin_client, query):
+    response = admin_client.get(f'/admin/export/orders.csv?{query}')
+    assert response.status_code == 400
+    assert 'invalid date' in response.get_json()['error']
+
+
+def test_date_range_export(admin_client):
+    response = admin_client.get('/admin/export/orders.csv?from=2020-01-01&to=2099-12-31')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).startswith('order_id,')
+
+
+def seed(db, count, batch=5000):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    product_id = ObjectId()
+    for offset in range(0, count, batch):
+        db.orders.insert_many([{
+            "user_id": ObjectId(),
+            "order_date": start + timedelta(minutes=i),
+            "delivery_date": start + timedelta(days=1, minutes=i),
+            "status": "Completed",
+            "total_amount": 100.0,
+            "order_items": [{"product_id": product_id, "product_name": "Milk (1L)", "product_unit": "Liter",
+                             "quantity": 2, "price": 50.0, "subtotal": 100.0}],
+        } for i in range(offset, min(offset + batch, count))], ordered=False)
+
+
+def peak_memory(db, dataset, fmt):
+    """(rows streamed, peak traced heap in bytes)."""
+    tracemalloc.start()
+    try:
+        lines = sum(chunk.count('\n') for chunk in exports.stream(db, dataset, fmt))
+        return lines, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(scope='module')
+def scratch_dbs(db):
+    """Two scratch databases with SMALL and LARGE orders."""
+    names = [f"{db.name}_export_{count}" for count in (SMALL, LARGE)]
+    small, large = (db.client[name] for name in names)
+    seed(small, SMALL)
+    seed(large, LARGE)
+    yield small, large
+    for name in names:
+        db.client.drop_database(name)
+
+
+@pytest.mark.parametrize('dataset', ['orders', 'order-items'])
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson'])
+def test_export_peak_memory_is_flat(scratch_dbs, dataset, fmt):
+    small, large = scratch_dbs
+    header = 1 if fmt == 'csv' else 0
+    small_rows, small_peak = peak_memory(small, dataset, fmt)
+    large_rows, large_peak = peak_memory(large, dataset, fmt)
+    assert (small_rows, large_rows) == (SMALL + header, LARGE + header)
+    # Ten times the orders must not cost ten times the memory: only one
+    # cursor batch (exports.BATCH_SIZE) is held at a time.
+    assert large_peak < 2 * small_peak, (small_peak, large_peak)
@@ -0,0 +1,87 @@
+"""
+Every query a route issues must be served by an index.
+
+The queries are recorded from real requests (query_profiler.capture), not
+copied from the routes, so a route that changes its filter or sort is
+checked as it is. Each one is explained against the test database and fails
+if its winning plan contains a COLLSCAN. Reads with no filter and no sort
+(the product listings, the sales rollup totals, estimated counts) are full
+reads by design and are exempt.
+"""
+
+import pytest
+
+import indexes
+import query_profiler
+
+ROUTES = [
+    # (client fixture, method, path, form data)
+    ('client', 'POST', '/login', {'username': '{customer}', 'password': 'wrong-password'}),
+    ('client', 'POST', '/register', {'username': '{customer}', 'email': 'new@example.com', 'password': 'x',
+                                     'phone': '9000000000', 'address': 'x'}),
+    ('client', 'POST', '/forgot-password', {'email': 'nobody@example.com'}),
+    ('client', 'GET', '/reset-password/not-a-token', None),
+    ('client', 'GET', '/api/v1/products', None),
+    ('customer_client', 'GET', '/user/dashboard', None),
+    ('customer_client', 'GET', '/user/orders', None),
+    ('customer_client', 'GET', '/user/receipt/{order_id}', None),
+    ('customer_client', 'GET', '/api/v1/orders', None),
+    ('customer_client', 'GET', '/api/v1/orders/{order_id}', None),
+    ('admin_client', 'GET', '/admin/dashboard', None),
+    ('admin_client', 'GET', '/admin/products', None),
+    ('admin_client', 'GET', '/admin/orders', None),
+    ('admin_client', 'GET', '/admin/orders?status=Pending', None),
+    ('admin_client', 'GET', '/admin/orders?status=Completed&from=2025-01-01&to=2030-12-31', None),
+    ('admin_client', 'GET', '/admin/users', None),
+    ('admin_client', 'GET', '/admin/users?q=cust', None),
+    ('admin_client', 'GET', '/admin/reports', None),
+]
+
+
+def is_full_read(entry):
+    """An unfiltered, unsorted read, which scans the collection by design."""
+    command = entry['command']
+    if entry['command_name'] == 'find':
+        return not command.get('filter') and not command.get('sort')
+    if entry['command_name'] == 'aggregate':
+        first = (command.get('pipeline') or [{}])[0]
+        return not {'$match', '$sort'} & set(first)
+    if entry['command_name'] == 'count':
+        return not command.get('query')
+    return False
+
+
+@pytest.fixture(scope='module')
+def placeholders(db, customer_id):
+    user = db.users.find_one({"_id": customer_id}, {"username": 1})
+    order = db.orders.find_one({"user_id": customer_id}, {"_id": 1})
+    return {'customer': user['username'], 'order_id': str(order['_id'])}
+
+
+@pytest.mark.parametrize('client_fixture, method, path, data', ROUTES)
+def test_route_queries_use_indexes(request, db, placeholders, client_fixture, method, path, data):
+    import catalog_cache
+    import dashboard_stats
+
+    client = request.getfixturevalue(client_fixture)
+    path = path.format(**placeholders)
+    data = {k: v.format(**placeholders) for k, v in data.items()} if data else None
+
+    # Cold caches, so the route issues every query it can.
+    catalog_cache.invalidate()
+    dashboard_stats.invalidate()
+    with query_profiler.capture() as log:
+        response = client.open(path, method=method, data=data)
+    assert response.status_code < 500
+
+    scans = []
+    for entry in log.entries:
+        plan = query_profiler.explain_plan(db, entry)
+        if plan is None or is_full_read(entry):
+            continue
+        stages = set(indexes.plan_stages(plan))
+        assert stages, f"no plan for {entry['shape']}"
+        if 'COLLSCAN' in stages:
+            scans.append(f"{entry['shape']}: {indexes.describe_plan(plan)}")
+    assert log.total, f"{method} {path} issued no queries"
+    assert not scans, f"{method} {path} scans a collection:\n  " + "\n  ".join(scans)
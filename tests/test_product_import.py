@@ -0,0 +1,24 @@
+"""
+CSV product import through the admin upload form.
+"""
+
+import io
+
+
+def upload(admin_client, body):
+    return admin_client.post('/admin/products/import', data={
+        'file': (io.BytesIO(body), 'products.csv'), 'stock_mode': 'set', 'dry_run': '1',
+    }, headers={'Accept': 'application/json'}, content_type='multipart/form-data')
+
+
+def test_non_finite_prices_are_rejected(admin_client):
+    response = upload(admin_client, b"name,price\nNaN Milk,nan\nInf Milk,inf\nCheap Milk,-Infinity\n")
+    assert response.status_code == 200
+    assert [e['line'] for e in response.get_json()['errors']] == [2, 3, 4]
+
+
+def test_nul_byte_is_reported_not_a_server_error(admin_client):
+    # Python < 3.11 raises csv.Error on NUL; later versions read it as data.
+    response = upload(admin_client, b"name,price\nMilk,5\x00\n")
+    assert response.status_code == 200
+    assert response.get_json()['errors']
@@ -0,0 +1,48 @@
+"""
+MongoDB query budgets per route.
+
+Each page is requested once to warm the per-worker caches (current user,
+catalog, dashboard snapshot), then again inside a budget: a second query of
+the same shape is an N+1 loop, and the total must stay within the route's
+budget even when those caches are cold.
+"""
+
+import pytest
+
+CUSTOMER = ('customer_client', 'customer_id')
+ADMIN = ('admin_client', 'admin_id')
+
+BUDGETS = [
+    # (who, path, max queries)
+    (CUSTOMER, '/user/dashboard', 3),
+    (CUSTOMER, '/user/orders', 3),
+    (CUSTOMER, '/api/v1/products', 2),
+    (CUSTOMER, '/api/v1/orders', 2),
+    (ADMIN, '/admin/dashboard', 8),
+    (ADMIN, '/admin/products', 2),
+    (ADMIN, '/admin/orders', 2),
+    (ADMIN, '/admin/users', 3),
+    (ADMIN, '/admin/reports', 4),
+]
+
+
+@pytest.mark.parametrize('who, path, max_queries', BUDGETS)
+def test_warm_route_has_no_repeated_queries(request, query_budget, who, path, max_queries):
+    client = request.getfixturevalue(who[0])
+    assert client.get(path).status_code == 200
+    with query_budget(max_queries=max_queries, max_same_shape=1):
+        assert client.get(path).status_code == 200
+
+
+@pytest.mark.parametrize('who, path, max_queries', BUDGETS)
+def test_cold_route_stays_within_budget(request, query_budget, who, path, max_queries):
+    import catalog_cache
+    import dashboard_stats
+    import user_context
+
+    client = request.getfixturevalue(who[0])
+    catalog_cache.invalidate()
+    dashboard_stats.invalidate()
+    user_context.invalidate(request.getfixturevalue(who[1]))
+    with query_budget(max_queries=max_queries, max_same_shape=1):
+        assert client.get(path).status_code == 200
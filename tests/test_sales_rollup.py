@@ -0,0 +1,27 @@
+"""
+Daily sales rollup reads.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import sales_rollup
+
+
+@pytest.fixture
+def rollup_db(db):
+    scratch = db.client[f"{db.name}_rollup"]
+    today = datetime.now(timezone.utc)
+    scratch[sales_rollup.COLLECTION].insert_many([
+        {"_id": sales_rollup.day_key(today - timedelta(days=i)), "orders": 1, "revenue": 10.0} for i in range(60)
+    ])
+    yield scratch
+    db.client.drop_database(scratch.name)
+
+
+@pytest.mark.parametrize('days', [1, 7, 30])
+def test_recent_days_returns_one_row_per_day(rollup_db, days):
+    rows = sales_rollup.recent_days(rollup_db, days)
+    assert len(rows) == days
+    assert rows[0]["_id"] == sales_rollup.day_key(datetime.now(timezone.utc))
@@ -0,0 +1,103 @@
+"""
+Current-user loading for request handlers.
+
+The logged-in user's "auth" view (username, is_admin) is loaded at most once
+per request into `flask.g` and kept in a small per-worker LRU with a TTL, so
+warm authorization checks need no database round trip. Anything that changes
+a user's credentials or admin flag must call `invalidate(user_id)`; other
+workers pick the change up when their entry expires after USER_CACHE_TTL.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, session
+
+import data_access
+
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 30))
+
+
+class TTLCache:
+    """Thread-safe bounded LRU whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def info(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+def current_user(db):
+    """
+    The logged-in user's auth view, or None. The returned dict is shared
+    across requests and must not be mutated.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    if 'current_user' in g:
+        return g.current_user
+
+    user = _cache.get(user_id)
+    if user is None:
+        user = data_access.get_user(db, user_id, 'auth')
+        if user is not None:
+            _cache.put(user_id, user)
+    g.current_user = user
+    return user
+
+
+def invalidate(user_id):
+    """Forget a user after their password or admin flag changed."""
+    user_id = str(user_id)
+    _cache.pop(user_id)
+    if g and g.get('current_user') and str(g.current_user.get('_id')) == user_id:
+        g.pop('current_user')
+
+
+def cache_info():
+    return _cache.info()
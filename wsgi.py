@@ -3,5 +3,12 @@ WSGI entry point for production deployment
 Used by Gunicorn, Heroku, Railway, Render, and other deployment platforms
 """
 import os
-from app_complete import app
+from app_complete import app, db
+import bootstrap
+import indexes
 
+# Create any missing indexes (a no-op when they already exist), then seed
+# the database once at worker startup so no request pays for it.
+for collection, error in indexes.ensure_indexes(db):
+    print(f"Index creation failed for {collection}: {error}")
+bootstrap.startup(db)